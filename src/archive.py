@@ -0,0 +1,216 @@
+import bisect
+import collections
+import datetime
+import json
+import mmap
+import os
+import struct
+import typing
+
+from entities import MINUTES_PER_DAY, LogDay, LogPeriod
+
+# date ordinal, start minute of day, end minute of day, task number (-1 for none), description offset and length
+RECORD = struct.Struct("<iHHiII")
+# date ordinal, record number
+DATE_INDEX = struct.Struct("<ii")
+# task number, date ordinal, record number
+TASK_INDEX = struct.Struct("<iii")
+
+NO_TASK = -1
+
+
+class ArchiveRecord(typing.NamedTuple):
+    date: datetime.date
+    start_minute: int
+    end_minute: int
+    task_id: typing.Optional[str]
+    description: str
+
+    @property
+    def duration_minutes(self) -> int:
+        return self.end_minute - self.start_minute
+
+    def to_log_period(self) -> LogPeriod:
+        day_minute = self.date.toordinal() * MINUTES_PER_DAY
+        return LogPeriod.from_minutes(
+            day_minute + self.start_minute, day_minute + self.end_minute, self.description, task_id=self.task_id
+        )
+
+
+class _MappedFile:
+    """Read-only mmap of a file of fixed-width structs, usable as a sequence of tuples. A missing file is empty."""
+
+    def __init__(self, path: str, record: struct.Struct):
+        self.record = record
+        self._file = open(path, "rb") if os.path.exists(path) else None
+        size = os.fstat(self._file.fileno()).st_size if self._file else 0
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._length = size // record.size
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index: int) -> tuple:
+        return self.record.unpack_from(self._mmap, index * self.record.size)
+
+    def read(self, offset: int, length: int) -> bytes:
+        return self._mmap[offset : offset + length]
+
+    def close(self):
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        if self._file:
+            self._file.close()
+
+
+class LogArchive:
+    """Columnar on-disk store of log periods with date and task indexes, queried through mmap.
+
+    records.bin holds fixed-width records in append order and descriptions.bin their text. date.idx and task.idx
+    are sorted record numbers, rewritten on every append. The directory is only created by the first append,
+    until then queries find no records.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.task_ids = self._load_task_ids()
+        self._task_numbers = {task_id: number for number, task_id in enumerate(self.task_ids)}
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load_task_ids(self) -> typing.List[str]:
+        if not os.path.exists(self._file("tasks.json")):
+            return []
+        with open(self._file("tasks.json"), encoding="utf-8") as tasks_file:
+            return json.load(tasks_file)
+
+    def _task_number(self, task_id: typing.Optional[str]) -> int:
+        if task_id is None:
+            return NO_TASK
+        if task_id not in self._task_numbers:
+            self._task_numbers[task_id] = len(self.task_ids)
+            self.task_ids.append(task_id)
+        return self._task_numbers[task_id]
+
+    def append(self, log_days: typing.Iterable[LogDay]) -> int:
+        os.makedirs(self.path, exist_ok=True)
+        records = _MappedFile(self._file("records.bin"), RECORD)
+        first_record = len(records)
+        records.close()
+
+        date_index = []
+        task_index = []
+        with open(self._file("records.bin"), "ab") as records_file, open(
+            self._file("descriptions.bin"), "ab"
+        ) as descriptions_file:
+            description_offset = descriptions_file.tell()
+            record_number = first_record
+            for log_day in log_days:
+                date_ordinal = log_day.date.toordinal()
+                for item in log_day.items:
+                    description = item.description.encode("utf-8")
+                    task_number = self._task_number(item.task_id)
+                    start_minute = item.start_minutes - date_ordinal * MINUTES_PER_DAY
+                    records_file.write(
+                        RECORD.pack(
+                            date_ordinal,
+                            start_minute,
+                            start_minute + item.duration_minutes,
+                            task_number,
+                            description_offset,
+                            len(description),
+                        )
+                    )
+                    descriptions_file.write(description)
+                    description_offset += len(description)
+                    date_index.append((date_ordinal, record_number))
+                    task_index.append((task_number, date_ordinal, record_number))
+                    record_number += 1
+
+        with open(self._file("tasks.json"), "w", encoding="utf-8") as tasks_file:
+            json.dump(self.task_ids, tasks_file)
+        self._merge_index("date.idx", DATE_INDEX, date_index)
+        self._merge_index("task.idx", TASK_INDEX, task_index)
+        return record_number - first_record
+
+    def _merge_index(self, name: str, record: struct.Struct, entries: typing.List[tuple]):
+        index = _MappedFile(self._file(name), record)
+        merged = [index[position] for position in range(len(index))]
+        index.close()
+        merged.extend(entries)
+        merged.sort()
+        with open(self._file(name + ".tmp"), "wb") as index_file:
+            for entry in merged:
+                index_file.write(record.pack(*entry))
+        os.replace(self._file(name + ".tmp"), self._file(name))
+
+    def _record_numbers(
+        self,
+        date_from: typing.Optional[datetime.date],
+        date_to: typing.Optional[datetime.date],
+        task_id: typing.Optional[str],
+    ) -> typing.Iterator[int]:
+        low = date_from.toordinal() if date_from else -(2**31)
+        high = date_to.toordinal() if date_to else 2**31 - 1
+        if task_id is None:
+            index = _MappedFile(self._file("date.idx"), DATE_INDEX)
+            start = bisect.bisect_left(index, (low,))
+            end = bisect.bisect_right(index, (high, 2**31 - 1))
+        else:
+            if task_id not in self._task_numbers:
+                return
+            task_number = self._task_numbers[task_id]
+            index = _MappedFile(self._file("task.idx"), TASK_INDEX)
+            start = bisect.bisect_left(index, (task_number, low))
+            end = bisect.bisect_right(index, (task_number, high, 2**31 - 1))
+        try:
+            for position in range(start, end):
+                yield index[position][-1]
+        finally:
+            index.close()
+
+    def query(
+        self,
+        date_from: typing.Optional[datetime.date] = None,
+        date_to: typing.Optional[datetime.date] = None,
+        task_id: typing.Optional[str] = None,
+    ) -> typing.Iterator[ArchiveRecord]:
+        """Records between the dates (inclusive), optionally for one task, in date order."""
+        records = _MappedFile(self._file("records.bin"), RECORD)
+        descriptions = _MappedFile(self._file("descriptions.bin"), struct.Struct("<c"))
+        try:
+            for record_number in self._record_numbers(date_from, date_to, task_id):
+                date_ordinal, start, end, task_number, offset, length = records[record_number]
+                yield ArchiveRecord(
+                    date=datetime.date.fromordinal(date_ordinal),
+                    start_minute=start,
+                    end_minute=end,
+                    task_id=None if task_number == NO_TASK else self.task_ids[task_number],
+                    description=descriptions.read(offset, length).decode("utf-8"),
+                )
+        finally:
+            records.close()
+            descriptions.close()
+
+    def total_minutes(
+        self,
+        date_from: typing.Optional[datetime.date] = None,
+        date_to: typing.Optional[datetime.date] = None,
+        task_id: typing.Optional[str] = None,
+        group_by: str = "task",
+    ) -> typing.Dict[typing.Any, int]:
+        """Minutes per task or per date, read from the fixed-width columns only."""
+        totals = collections.Counter()
+        records = _MappedFile(self._file("records.bin"), RECORD)
+        try:
+            for record_number in self._record_numbers(date_from, date_to, task_id):
+                date_ordinal, start, end, task_number, _, _ = records[record_number]
+                if group_by == "date":
+                    key = datetime.date.fromordinal(date_ordinal)
+                else:
+                    key = None if task_number == NO_TASK else self.task_ids[task_number]
+                totals[key] += end - start
+        finally:
+            records.close()
+        return dict(totals)
@@ -0,0 +1,196 @@
+import asyncio
+import dataclasses
+import datetime
+import json
+import logging
+import random
+import time
+import typing
+
+from backends import SubmitBackend
+from entities import LogPeriod
+from uploader import CheckFunction, SubmitFunction, SubmitResult
+
+logger_async_uploader = logging.getLogger("async_uploader")
+
+
+@dataclasses.dataclass
+class AsyncUploadOptions:
+    rate: float = 5.0
+    burst: int = 5
+    retries: int = 3
+    backoff: float = 1.0
+    max_backoff: float = 60.0
+    queue_size: int = 100
+    dead_letter_path: str = "dead_letter.jsonl"
+
+
+class TokenBucket:
+    """Allows `rate` submissions per second on average, `burst` of them back to back."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class DeadLetterFile:
+    """JSON-lines file of the entries that failed for good, with the error."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.count = 0
+        self._file = None
+
+    def write(self, platform: str, log_period: LogPeriod, error: Exception):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        line = json.dumps(
+            {
+                "platform": platform,
+                "task_id": log_period.task_id,
+                "start": log_period.start.isoformat(),
+                "end": log_period.end.isoformat(),
+                "description": log_period.description,
+                "error": repr(error),
+                "failed_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            }
+        )
+        self._file.write(line + "\n")
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        if self._file:
+            self._file.close()
+
+
+async def _parse(log_periods: typing.Iterable[LogPeriod], checks: asyncio.Queue):
+    """Read the input in a thread: a csv or module source may block on disk."""
+    iterator = iter(log_periods)
+    index = 0
+    while True:
+        log_period = await asyncio.to_thread(next, iterator, None)
+        if log_period is None:
+            break
+        await checks.put((index, log_period))
+        index += 1
+    await checks.put(None)
+
+
+async def _validate(
+    platform: str,
+    check: CheckFunction,
+    checks: asyncio.Queue,
+    submits: asyncio.Queue,
+    results: typing.Dict[int, SubmitResult],
+    dead_letter: DeadLetterFile,
+    workers: int,
+):
+    while True:
+        item = await checks.get()
+        if item is None:
+            break
+        index, log_period = item
+        try:
+            check(log_period)
+        except Exception as e:
+            dead_letter.write(platform, log_period, e)
+            results[index] = SubmitResult(index=index, log_period=log_period, error=e)
+            continue
+        await submits.put(item)
+    for _ in range(workers):
+        await submits.put(None)
+
+
+async def _submit_worker(
+    platform: str,
+    backend: SubmitBackend,
+    submit: SubmitFunction,
+    submits: asyncio.Queue,
+    bucket: TokenBucket,
+    options: AsyncUploadOptions,
+    results: typing.Dict[int, SubmitResult],
+    dead_letter: DeadLetterFile,
+):
+    while True:
+        item = await submits.get()
+        if item is None:
+            return
+        index, log_period = item
+        attempt = 0
+        while True:
+            await bucket.acquire()
+            try:
+                await asyncio.to_thread(submit, backend, log_period)
+            except Exception as e:
+                if attempt < options.retries and backend.is_transient(e):
+                    delay = min(options.max_backoff, options.backoff * 2**attempt) * random.uniform(0.5, 1.0)
+                    logger_async_uploader.warning("Retrying in %.1fs after %r: %s", delay, e, log_period)
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                    continue
+                logger_async_uploader.exception("Submit failed: %s", log_period)
+                dead_letter.write(platform, log_period, e)
+                results[index] = SubmitResult(index=index, log_period=log_period, error=e)
+            else:
+                results[index] = SubmitResult(index=index, log_period=log_period)
+            break
+
+
+async def _upload(
+    platform: str,
+    backends: typing.List[SubmitBackend],
+    log_periods: typing.Iterable[LogPeriod],
+    check: CheckFunction,
+    submit: SubmitFunction,
+    options: AsyncUploadOptions,
+) -> typing.List[SubmitResult]:
+    checks = asyncio.Queue(maxsize=options.queue_size)
+    submits = asyncio.Queue(maxsize=options.queue_size)
+    bucket = TokenBucket(options.rate, options.burst)
+    dead_letter = DeadLetterFile(options.dead_letter_path)
+    results = {}
+    try:
+        await asyncio.gather(
+            _parse(log_periods, checks),
+            _validate(platform, check, checks, submits, results, dead_letter, len(backends)),
+            *(
+                _submit_worker(platform, backend, submit, submits, bucket, options, results, dead_letter)
+                for backend in backends
+            ),
+        )
+    finally:
+        dead_letter.close()
+    if dead_letter.count:
+        print("Dead letters: %s written to %s" % (dead_letter.count, dead_letter.path))
+    return [results[index] for index in sorted(results)]
+
+
+def async_upload(
+    platform: str,
+    backends: typing.List[SubmitBackend],
+    log_periods: typing.Iterable[LogPeriod],
+    check: CheckFunction,
+    submit: SubmitFunction,
+    options: AsyncUploadOptions,
+) -> typing.List[SubmitResult]:
+    """Parse, validate and submit stages joined by bounded queues, submissions paced by a token bucket.
+
+    Each backend session runs its blocking calls in a worker thread, so a slow page load only holds up
+    that session. Transient failures are retried with exponential backoff, the rest go to the dead letter file.
+    """
+    return asyncio.run(_upload(platform, backends, log_periods, check, submit, options))
@@ -0,0 +1,65 @@
+import datetime
+import threading
+import typing
+
+from entities import LogPeriod
+from kimai_mapping import KimaiMapping, KimaiTarget
+from reconcile import RemoteEntry
+
+KIMAI_URL = "https://tracker.sanecum.io"
+REDMINE_URL = "https://red.backstage.pm"
+
+
+class SubmitBackend:
+    """Platform session used by LogDataService: log in once, then submit one LogPeriod per call."""
+
+    # Set by LogDataService to one dict for all sessions, so each issue is looked up once per run
+    issue_titles: typing.Optional[typing.Dict[str, str]] = None
+    # A lock per issue id: a session only waits for a lookup of the same issue
+    _issue_title_locks: typing.Dict[str, threading.Lock] = {}
+    # Set by LogDataService from --kimai_config, the built-in project, activity and tag otherwise
+    kimai_mapping: KimaiMapping = KimaiMapping()
+
+    def kimai_login(self):
+        raise NotImplementedError
+
+    def kimai_add(self, log_period: LogPeriod, format_date: str, format_time: str):
+        raise NotImplementedError
+
+    def redmine_login(self):
+        raise NotImplementedError
+
+    def redmine_add(self, log_period: LogPeriod, show_task: bool = False):
+        raise NotImplementedError
+
+    def redmine_issue_title(self, task_id: str) -> str:
+        raise NotImplementedError
+
+    def kimai_entries(self, date_from: datetime.date, date_to: datetime.date) -> typing.List[RemoteEntry]:
+        """Entries already in Kimai between the dates (inclusive)."""
+        raise NotImplementedError
+
+    def redmine_entries(self, date_from: datetime.date, date_to: datetime.date) -> typing.List[RemoteEntry]:
+        """Own time entries already in Redmine between the dates (inclusive)."""
+        raise NotImplementedError
+
+    def kimai_target(self, log_period: LogPeriod) -> KimaiTarget:
+        return self.kimai_mapping.target(log_period.task_id)
+
+    def is_transient(self, error: Exception) -> bool:
+        """Whether the failed submission can be retried as is, without risking a duplicate entry."""
+        return False
+
+    def issue_title(self, task_id: str) -> str:
+        if self.issue_titles is None:
+            return self.redmine_issue_title(task_id)
+        if task_id in self.issue_titles:
+            return self.issue_titles[task_id]
+        # dict.setdefault is atomic, so every session gets the same lock
+        with self._issue_title_locks.setdefault(task_id, threading.Lock()):
+            if task_id not in self.issue_titles:
+                self.issue_titles[task_id] = self.redmine_issue_title(task_id)
+            return self.issue_titles[task_id]
+
+    def close(self):
+        pass
@@ -0,0 +1,320 @@
+import argparse
+import csv
+import datetime
+import gc
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import typing
+
+from async_uploader import AsyncUploadOptions, async_upload
+from backends import SubmitBackend
+from entities import MINUTES_PER_DAY, LogDay, LogPeriod, LogTask, SlotTime, WorkingDaySet
+from main import csv_import_data
+from report import GROUPINGS, Report
+from uploader import iter_log_periods, upload
+from utils import double_time, double_time_parallel
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1M": 1_000_000}
+
+FIRST_DATE = datetime.date(2025, 1, 1)
+DAY_START_MINUTE = 9 * 60
+WORKING_MINUTES = 8 * 60
+
+MIN_REPEAT_SECONDS = 0.2
+
+
+def _is_pinned(index: int, pinned_fraction: float) -> bool:
+    # Spreads the pinned periods evenly: a fraction of 0.25 pins every fourth one
+    return int((index + 1) * pinned_fraction) > int(index * pinned_fraction)
+
+
+def _working_dates(days: int) -> typing.Iterator[datetime.date]:
+    date = FIRST_DATE
+    while days:
+        if date.weekday() < 5:
+            yield date
+            days -= 1
+        date += datetime.timedelta(days=1)
+
+
+def _day_layout(periods_per_day: int) -> typing.Tuple[int, int]:
+    """Minutes between period starts and period length, so the doubled periods still fit a working day."""
+    step = max(2, WORKING_MINUTES // periods_per_day)
+    return step, step // 2
+
+
+def generate_log_days(
+    days: int, periods_per_day: int, skip_task: str = "skip", pinned_fraction: float = 0.25
+) -> typing.List[LogDay]:
+    """Weekdays from 2025-01-01, periods spread over 09:00-17:00 at half their spacing,
+    `pinned_fraction` of them with `skip_task`.
+    """
+    step, duration = _day_layout(periods_per_day)
+    log_days = []
+    for date in _working_dates(days):
+        day_minute = date.toordinal() * MINUTES_PER_DAY + DAY_START_MINUTE
+        items = []
+        for index in range(periods_per_day):
+            start = day_minute + index * step
+            task_id = skip_task if _is_pinned(index, pinned_fraction) else str(index % 7)
+            items.append(LogPeriod.from_minutes(start, start + duration, "Period %s" % index, task_id=task_id))
+        log_days.append(LogDay.from_date(date, items))
+    return log_days
+
+
+def generate_csv(path: str, days: int, periods_per_day: int) -> int:
+    """A --format csv export of the same layout as generate_log_days. Returns the file size in bytes."""
+    step, duration = _day_layout(periods_per_day)
+    with open(path, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["date", "start", "end", "description"])
+        for date in _working_dates(days):
+            log_date = date.strftime("%d.%m.%Y")
+            for index in range(periods_per_day):
+                start = DAY_START_MINUTE + index * step
+                writer.writerow(
+                    [
+                        log_date,
+                        "%d:%02d" % divmod(start, 60),
+                        "%d:%02d" % divmod(start + duration, 60),
+                        "Period %s" % index,
+                    ]
+                )
+    return os.path.getsize(path)
+
+
+def add_slots(log_days: typing.List[LogDay], skip_task: str) -> WorkingDaySet:
+    """WorkingDaySet.add_slot alone: the slots are built beforehand and placed undoubled."""
+    slots = [
+        (
+            SlotTime.from_minutes(
+                log_period.start_minutes,
+                log_period.duration_minutes,
+                LogTask(pk=log_period.task_id, description=log_period.description),
+            ),
+            log_period.task_id != skip_task,
+        )
+        for log_period in iter_log_periods(log_days)
+    ]
+    data = WorkingDaySet()
+    for slot, can_divorce in slots:
+        data.add_slot(slot, can_divorce=can_divorce, any_after=can_divorce)
+    return data
+
+
+class OfflineBackend(SubmitBackend):
+    """Stand-in for the platform sessions: formats every entry like the real backends, sends nothing."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.submitted = 0
+
+    def _send(self):
+        self.submitted += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def kimai_login(self):
+        pass
+
+    def kimai_add(self, log_period: LogPeriod, format_date: str, format_time: str):
+        log_period.start.strftime(format_date)
+        log_period.start.strftime(format_time)
+        log_period.end.strftime(format_time)
+        self._send()
+
+    def redmine_login(self):
+        pass
+
+    def redmine_add(self, log_period: LogPeriod, show_task: bool = False):
+        log_period.start.strftime("%Y-%m-%d")
+        str(log_period.get_duration())
+        self._send()
+
+
+def submit_kimai(backend: SubmitBackend, log_period: LogPeriod):
+    backend.kimai_add(log_period, format_date="%d.%m.%Y", format_time="%H:%M")
+
+
+def _time(function: typing.Callable[[], typing.Any], loops: int) -> float:
+    # As in timeit: collection pauses depend on what earlier steps left behind
+    gc.collect()
+    gc.disable()
+    try:
+        started = time.perf_counter()
+        for _ in range(loops):
+            function()
+        return (time.perf_counter() - started) / loops
+    finally:
+        gc.enable()
+
+
+def _reference_workload():
+    """Fixed interpreter work timed next to every step: the machine's speed drifts between and during runs."""
+    periods = {}
+    for index in range(5_000):
+        periods.setdefault(index % 97, []).append(str(index))
+    return len(periods)
+
+
+def measure(name: str, function: typing.Callable[[], typing.Any], count: int, size: str = "", repeats: int = 3) -> dict:
+    """Best time of `repeats` runs without tracemalloc, which slows allocation down, then one traced run for memory.
+
+    Like timeit, a fast step is run in loops of at least MIN_REPEAT_SECONDS per repeat, so timer and scheduling
+    noise stay small against the measured time.
+    """
+    # The first run also warms up caches
+    loops = math.ceil(MIN_REPEAT_SECONDS / max(_time(function, 1), 1e-6))
+    reference_loops = math.ceil(MIN_REPEAT_SECONDS / max(_time(_reference_workload, 1), 1e-6))
+    durations = []
+    reference_durations = []
+    for _ in range(repeats):
+        reference_durations.append(_time(_reference_workload, reference_loops))
+        durations.append(_time(function, loops))
+    duration = min(durations)
+
+    gc.collect()
+    tracemalloc.start()
+    function()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        "%-24s %5s %8s items %8.3fs %10.0f items/s %8.1f B/item retained %8.1f B/item peak"
+        % (name, size, count, duration, count / duration, current / count, peak / count)
+    )
+    return {
+        "name": name,
+        "size": size,
+        "count": count,
+        "seconds": duration,
+        "loops": loops,
+        "repeats": repeats,
+        "reference_seconds": min(reference_durations),
+        "peak_bytes": peak,
+    }
+
+
+def run(
+    sizes: typing.List[str],
+    periods_per_day: int,
+    pinned_fraction: float,
+    workers: int,
+    skip_task: str = "skip",
+    repeats: int = 3,
+) -> typing.List[dict]:
+    results = []
+    for size in sizes:
+        days = -(-SIZES[size] // periods_per_day)
+        count = days * periods_per_day
+
+        log_days = []
+
+        def build():
+            # Replaced on every run, so repeats do not pile up
+            log_days[:] = generate_log_days(days, periods_per_day, skip_task, pinned_fraction)
+
+        results.append(measure("LogDay build", build, count, size, repeats))
+        results.append(measure("WorkingDaySet.add_slot", lambda: add_slots(log_days, skip_task), count, size, repeats))
+        results.append(measure("double_time", lambda: list(double_time(log_days, skip_task)), count, size, repeats))
+        results.append(
+            measure("double_time_parallel", lambda: double_time_parallel(log_days, skip_task), count, size, repeats)
+        )
+        results.append(measure("report", lambda: Report(GROUPINGS).add_log_days(log_days), count, size, repeats))
+
+        backends = [OfflineBackend() for _ in range(workers)]
+        results.append(
+            measure("upload", lambda: upload(backends, iter_log_periods(log_days), submit_kimai), count, size, repeats)
+        )
+        options = AsyncUploadOptions(rate=1e9, burst=workers)
+        results.append(
+            measure(
+                "async_upload",
+                lambda: async_upload(
+                    "kimai", backends, iter_log_periods(log_days), lambda _: None, submit_kimai, options
+                ),
+                count,
+                size,
+                repeats,
+            )
+        )
+        del log_days[:]
+
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, "benchmark.csv")
+            csv_bytes = generate_csv(csv_path, days, periods_per_day)
+            result = measure("csv_import_data", lambda: sum(1 for _ in csv_import_data(csv_path)), count, size, repeats)
+            result["file_bytes"] = csv_bytes
+            results.append(result)
+    return results
+
+
+def compare(results: typing.List[dict], baseline: typing.List[dict], threshold: float) -> int:
+    """Print the change against the previous run, return the number of slowdowns above `threshold` percent."""
+    previous = {(result["name"], result["size"]): result for result in baseline}
+    regressions = 0
+    print("Against the previous run:")
+    for result in results:
+        before = previous.get((result["name"], result["size"]))
+        if before is None:
+            continue
+        time_ratio = result["seconds"] / before["seconds"]
+        if "reference_seconds" in before:
+            # Against the reference workload, so a slower machine is not a slower step
+            time_ratio /= result["reference_seconds"] / before["reference_seconds"]
+        time_change = (time_ratio - 1) * 100
+        memory_change = (result["peak_bytes"] / max(before["peak_bytes"], 1) - 1) * 100
+        slower = time_change > threshold
+        regressions += slower
+        print(
+            "%-24s %5s %+7.1f%% time %+7.1f%% peak memory%s"
+            % (result["name"], result["size"], time_change, memory_change, "  SLOWER" if slower else "")
+        )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput and peak memory of the scheduler, ingest and reporting")
+    parser.add_argument("--sizes", type=str, default="1k,100k", help="Periods per run: 1k, 100k and/or 1M")
+    parser.add_argument("--periods", type=int, default=8, help="Periods per day")
+    parser.add_argument("--pinned", type=float, default=0.25, help="Fraction of skip_task periods")
+    parser.add_argument("--workers", type=int, default=1, help="Offline backend sessions for the upload benchmarks")
+    parser.add_argument("--repeats", type=int, default=3, help="Timed runs per step, the best one counts")
+    parser.add_argument("--baseline", type=str, default="benchmark.json", help="Results of the previous run")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Slowdown in percent reported as regression")
+    parser.add_argument("--fail_on_regression", action="store_true", help="Exit with 1 on any regression")
+    args = parser.parse_args()
+
+    sizes = args.sizes.split(",")
+    if not set(sizes) <= set(SIZES):
+        parser.error("--sizes takes a comma separated list of: %s" % ", ".join(SIZES))
+
+    results = run(sizes, args.periods, args.pinned, args.workers, repeats=args.repeats)
+
+    regressions = 0
+    baseline = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+    # Keep the previous results of the sizes not run this time
+    measured = {(result["name"], result["size"]) for result in results}
+    results += [result for result in baseline if (result["name"], result["size"]) not in measured]
+    with open(args.baseline, "w") as baseline_file:
+        json.dump(
+            {
+                "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                "python": sys.version.split()[0],
+                "periods_per_day": args.periods,
+                "pinned_fraction": args.pinned,
+                "results": results,
+            },
+            baseline_file,
+            indent=2,
+        )
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
@@ -0,0 +1,116 @@
+import builtins
+import contextlib
+import hashlib
+import importlib
+import importlib.util
+import io
+import logging
+import os
+import pickle
+import sys
+import typing
+
+import entities
+from entities import LogDay
+from utils import pack_log_days, unpack_log_days
+
+logger_data_cache = logging.getLogger("data_cache")
+
+CACHE_VERSION = 3
+
+# Files of the data modules, the scheduler and whatever else they read live below this directory
+SOURCE_ROOT = os.path.dirname(os.path.abspath(entities.__file__))
+
+SourceKey = typing.Tuple[str, int, str]
+
+
+def _source_key(path: str) -> SourceKey:
+    with open(path, "rb") as source_file:
+        digest = hashlib.sha1(source_file.read()).hexdigest()
+    return path, os.stat(path).st_mtime_ns, digest
+
+
+def _is_source(path: str) -> bool:
+    return path.startswith(SOURCE_ROOT + os.sep) and "__pycache__" not in path.split(os.sep) and os.path.isfile(path)
+
+
+@contextlib.contextmanager
+def _recording_opens() -> typing.Iterator[typing.Set[str]]:
+    """Record the paths of the files opened by name inside the block, such as a calendar JSON read by a data module."""
+    opened_paths = set()
+    builtin_open, io_open = builtins.open, io.open
+
+    def recording_open(file, *args, **kwargs):
+        if isinstance(file, (str, os.PathLike)):
+            opened_paths.add(os.path.abspath(file))
+        return builtin_open(file, *args, **kwargs)
+
+    builtins.open = io.open = recording_open
+    try:
+        yield opened_paths
+    finally:
+        builtins.open, io.open = builtin_open, io_open
+
+
+def _import_log_days(
+    module_path: str, variable: str, origin: str
+) -> typing.Tuple[typing.List[LogDay], typing.List[SourceKey]]:
+    """Import the module and return its log days with the keys of the files they depend on: the module itself
+    wherever it lives, and below SOURCE_ROOT the modules loaded by then (sibling helpers, entities, utils,
+    work_calendar, ...) and the files read while importing it.
+    """
+    with _recording_opens() as opened_paths:
+        module = importlib.import_module(module_path)
+        log_days = list(getattr(module, variable))
+
+    paths = opened_paths | {
+        os.path.abspath(loaded.__file__) for loaded in list(sys.modules.values()) if getattr(loaded, "__file__", None)
+    }
+    dependencies = {path for path in paths if _is_source(path)} | {origin}
+    return log_days, [_source_key(path) for path in sorted(dependencies)]
+
+
+def _is_fresh(dependencies: typing.List[SourceKey]) -> bool:
+    for path, mtime_ns, digest in dependencies:
+        try:
+            if _source_key(path) != (path, mtime_ns, digest):
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def _cache_path(source_path: str, var_name: str) -> str:
+    directory, file_name = os.path.split(source_path)
+    name = os.path.splitext(file_name)[0]
+    return os.path.join(directory, "__pycache__", "%s.%s.logdays.pickle" % (name, var_name))
+
+
+def load_log_days(module_path: str, variable: str) -> typing.List[LogDay]:
+    """Return `module_path.variable`, served from a pickle next to the module's bytecode while every file it
+    depends on is unchanged (by mtime and content hash), so the module is not imported at all.
+    """
+    spec = importlib.util.find_spec(module_path)
+    if spec is None or not spec.origin or not os.path.isfile(spec.origin):
+        module = importlib.import_module(module_path)
+        return list(getattr(module, variable))
+
+    key = (CACHE_VERSION, variable, os.path.abspath(spec.origin))
+    cache_path = _cache_path(spec.origin, variable)
+    try:
+        with open(cache_path, "rb") as cache_file:
+            cached_key, dependencies, data = pickle.load(cache_file)
+        if cached_key == key and _is_fresh(dependencies):
+            return unpack_log_days(data)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        pass
+
+    log_days, dependencies = _import_log_days(module_path, variable, os.path.abspath(spec.origin))
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path + ".tmp", "wb") as cache_file:
+            pickle.dump((key, dependencies, pack_log_days(log_days)), cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(cache_path + ".tmp", cache_path)
+    except OSError:
+        logger_data_cache.warning("Can not write cache %s", cache_path)
+    return log_days
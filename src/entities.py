@@ -4,23 +4,68 @@ import json
 import logging
 import typing
 
+from sortedcontainers import SortedKeyList
+
+from work_calendar import DayCapacity, WorkCalendar
+
 logger_log_set = logging.getLogger("log_day")
 
 
+MINUTES_PER_DAY = 24 * 60
+
+
+def to_minutes(value: datetime.datetime) -> int:
+    """Minutes since 0001-01-01, so that `minutes // MINUTES_PER_DAY` is the date ordinal."""
+    return value.toordinal() * MINUTES_PER_DAY + value.hour * 60 + value.minute
+
+
+def from_minutes(minutes: int) -> datetime.datetime:
+    day, minute_of_day = divmod(minutes, MINUTES_PER_DAY)
+    hour, minute = divmod(minute_of_day, 60)
+    return datetime.datetime.combine(datetime.date.fromordinal(day), datetime.time(hour=hour, minute=minute))
+
+
+def parse_time_minutes(value: str) -> int:
+    """Minute of the day for "H:MM"."""
+    hour, minute = value.split(":")
+    hour, minute = int(hour), int(minute)
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError("Invalid time: %s" % value)
+    return hour * 60 + minute
+
+
 class LogPeriod:
-    _start_str: str
-    _end_str: str
+    """Start and end are kept as minutes (see to_minutes); datetimes are built on access."""
+
+    __slots__ = ("_start_minute", "_end_minute", "_day", "_task_id", "description")
+
+    _start_minute: int
+    _end_minute: int
+    _day: typing.Optional[int]
     _task_id: str
-    start: datetime.datetime
-    end: datetime.datetime
     description: str
 
     def __init__(self, start: str, end: str, description: str, task_id: typing.Optional[str | int] = None):
-        self._start_str = start
-        self._end_str = end
+        self._start_minute = parse_time_minutes(start)
+        self._end_minute = parse_time_minutes(end)
+        self._day = None
         self._task_id = task_id and str(task_id)
         self.description = description
 
+    @classmethod
+    def from_minutes(
+        cls, start_minute: int, end_minute: int, description: str, task_id: typing.Optional[str | int] = None
+    ) -> "LogPeriod":
+        """Build from absolute minutes (see to_minutes) without going through "H:MM" strings."""
+        day = start_minute // MINUTES_PER_DAY
+        log_period = cls.__new__(cls)
+        log_period._start_minute = start_minute - day * MINUTES_PER_DAY
+        log_period._end_minute = end_minute - day * MINUTES_PER_DAY
+        log_period._day = day
+        log_period._task_id = task_id and str(task_id)
+        log_period.description = description
+        return log_period
+
     def __str__(self):
         return f"{self.start}-{self.end} {self.description}"
 
@@ -28,18 +73,35 @@ class LogPeriod:
     def task_id(self):
         return self._task_id
 
+    @property
+    def start_minutes(self) -> int:
+        if self._day is None:
+            raise AttributeError("LogPeriod date is not set")
+        return self._day * MINUTES_PER_DAY + self._start_minute
+
+    @property
+    def end_minutes(self) -> int:
+        if self._day is None:
+            raise AttributeError("LogPeriod date is not set")
+        return self._day * MINUTES_PER_DAY + self._end_minute
+
+    @property
+    def start(self) -> datetime.datetime:
+        return from_minutes(self.start_minutes)
+
+    @property
+    def end(self) -> datetime.datetime:
+        return from_minutes(self.end_minutes)
+
     def set_date(self, date: datetime.date):
-        start_hour, start_minute = self._start_str.split(":")
-        self.start = datetime.datetime(
-            year=date.year, month=date.month, day=date.day, hour=int(start_hour), minute=int(start_minute)
-        )
-        end_hour, end_minute = self._end_str.split(":")
-        self.end = datetime.datetime(
-            year=date.year, month=date.month, day=date.day, hour=int(end_hour), minute=int(end_minute)
-        )
+        self._day = date.toordinal()
+
+    @property
+    def duration_minutes(self) -> int:
+        return self._end_minute - self._start_minute
 
     def get_duration(self):
-        return self.end - self.start
+        return datetime.timedelta(minutes=self.duration_minutes)
 
 
 @dataclasses.dataclass
@@ -50,8 +112,16 @@ class LogDay:
     def __init__(self, date: str, items: typing.List[LogPeriod]):
         if not date.endswith(".2025"):
             date = date + ".2025"
-        self.date = datetime.datetime.strptime(date, "%d.%m.%Y").date()
+        self._set(datetime.datetime.strptime(date, "%d.%m.%Y").date(), items)
 
+    @classmethod
+    def from_date(cls, date: datetime.date, items: typing.List[LogPeriod]) -> "LogDay":
+        log_day = cls.__new__(cls)
+        log_day._set(date, items)
+        return log_day
+
+    def _set(self, date: datetime.date, items: typing.List[LogPeriod]):
+        self.date = date
         self.items = []
         for item in items:
             item.set_date(self.date)
@@ -64,16 +134,20 @@ class LogDay:
         return datetime.timedelta(seconds=sum(item.get_duration().seconds for item in self.items))
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class LogTask:
     pk: str
     description: str
 
 
 class SlotTime:
-    start: datetime.datetime
-    duration: datetime.timedelta
-    task: typing.Optional[LogTask] = None
+    """Start and duration are kept as minutes (see to_minutes); datetimes are built on access."""
+
+    __slots__ = ("start_minute", "duration_minutes", "task", "_initial_start_minute")
+
+    start_minute: int
+    duration_minutes: int
+    task: typing.Optional[LogTask]
 
     def __init__(
         self,
@@ -82,30 +156,65 @@ class SlotTime:
         task: typing.Optional[LogTask] = None,
     ):
         if start is None:
-            start = datetime.time(hour=9)
-        self.start = start
-        self.duration = duration
+            start = datetime.datetime.combine(datetime.date.today(), datetime.time(hour=9))
+        self.start_minute = to_minutes(start)
+        self.duration_minutes = duration // datetime.timedelta(minutes=1)
         self.task = task
 
-        self._initial_start = self.start
+        self._initial_start_minute = self.start_minute
+
+    @classmethod
+    def from_minutes(cls, start_minute: int, duration_minutes: int, task: typing.Optional[LogTask] = None):
+        slot = cls.__new__(cls)
+        slot.start_minute = start_minute
+        slot.duration_minutes = duration_minutes
+        slot.task = task
+        slot._initial_start_minute = start_minute
+        return slot
+
+    def set_next_day(self, calendar: typing.Optional[WorkCalendar] = None):
+        if calendar is not None:
+            day = self.start_minute // MINUTES_PER_DAY
+            self.start_minute += (calendar.next_available(day) - day) * MINUTES_PER_DAY
+            return
 
-    def set_next_day(self):
-        weekday = self.start.weekday()
+        weekday = (self.start_minute // MINUTES_PER_DAY + 6) % 7
         add_days = 1
         if weekday == 4:  # Friday
             add_days = 3
 
-        self.start = self.start + datetime.timedelta(days=add_days)
+        self.start_minute += add_days * MINUTES_PER_DAY
 
     def get_relocate_duration(self):
-        return self.start - self._initial_start
+        return datetime.timedelta(minutes=self.start_minute - self._initial_start_minute)
+
+    def get_relocate_working_days(self, calendar: WorkCalendar) -> int:
+        return calendar.available_days_between(
+            self._initial_start_minute // MINUTES_PER_DAY, self.start_minute // MINUTES_PER_DAY
+        )
 
     def set_start(self, start: datetime.datetime):
-        self.start = start
+        self.start_minute = to_minutes(start)
+
+    @property
+    def start(self) -> datetime.datetime:
+        return from_minutes(self.start_minute)
+
+    @property
+    def duration(self) -> datetime.timedelta:
+        return datetime.timedelta(minutes=self.duration_minutes)
+
+    @property
+    def end_minute(self) -> int:
+        return self.start_minute + self.duration_minutes
 
     @property
     def end(self):
-        return self.start + self.duration
+        return from_minutes(self.end_minute)
+
+    @property
+    def date(self) -> datetime.date:
+        return datetime.date.fromordinal(self.start_minute // MINUTES_PER_DAY)
 
     def __str__(self):
         return f"{self.start.strftime("%H:%M")}-{self.end.strftime("%H:%M")} {self.task}"
@@ -114,124 +223,205 @@ class SlotTime:
         return f"{self.__class__.__name__}({self})"
 
     def insert(self, other: "SlotTime"):
+        make = SlotTime.from_minutes
+        self_end, other_start, other_end = self.end_minute, other.start_minute, other.end_minute
         parts = []
-        if self.start < other.start:
-            parts.append(SlotTime(self.start, other.start - self.start, None))
+        if self.start_minute < other_start:
+            parts.append(make(self.start_minute, other_start - self.start_minute, None))
 
-        if self.end > other.end:
-            parts.append(SlotTime(other.start, other.duration, other.task))
-            parts.append(SlotTime(other.end, self.end - other.end, None))
+        if self_end > other_end:
+            # The whole slot fits: place it as is
+            parts.append(other)
+            parts.append(make(other_end, self_end - other_end, None))
             return parts, None
-        if self.end == other.end:
-            parts.append(SlotTime(other.start, self.end - other.start, other.task))
+        if self_end == other_end:
+            parts.append(other)
             return parts, None
         # Divorce slot
-        parts.append(SlotTime(other.start, self.end - other.start, other.task))
-        return parts, SlotTime(self.end, other.end - self.end, other.task)
+        parts.append(make(other_start, self_end - other_start, other.task))
+        return parts, make(self_end, other_end - self_end, other.task)
+
+
+def _slot_start(slot: SlotTime) -> int:
+    return slot.start_minute
 
 
 class WorkingDay:
     class WorkingDayFull(Exception):
         pass
 
+    class SlotUnavailable(Exception):
+        pass
+
     date: datetime.date
-    slots: typing.List[SlotTime]
+    slots: SortedKeyList
+    free_slots: SortedKeyList
 
     DEFAULT_DURATION_WORKING_DAY = datetime.timedelta(hours=8)
 
-    def __init__(self, date: datetime.date):
+    def __init__(self, date: datetime.date, calendar: typing.Optional[WorkCalendar] = None):
         self.date = date
-        start = datetime.datetime(
-            year=date.year,
-            month=date.month,
-            day=date.day,
-            hour=8,
-        )
-        self.slots = [
-            SlotTime(start=start, duration=self.DEFAULT_DURATION_WORKING_DAY, task=None),
-        ]
+        start_minute = date.toordinal() * MINUTES_PER_DAY
+        if calendar is None:
+            start_minute += 8 * 60
+            self._day_minutes = self.DEFAULT_DURATION_WORKING_DAY // datetime.timedelta(minutes=1)
+        else:
+            capacity = calendar.capacity(date.toordinal())
+            if not capacity.minutes:
+                # A day off only ever takes pinned periods, at any time of the day
+                capacity = DayCapacity(start_minute=0, minutes=MINUTES_PER_DAY)
+            start_minute += capacity.start_minute
+            self._day_minutes = capacity.minutes
+        # Slots are contiguous and never overlap, so ordering by start also orders by end
+        self.slots = SortedKeyList(key=_slot_start)
+        self.free_slots = SortedKeyList(key=_slot_start)
+        self._task_minutes = 0
+        self._add(SlotTime.from_minutes(start_minute, self._day_minutes))
 
     def __str__(self):
         return json.dumps([str(slot) for slot in self.slots], indent=4)
 
+    def _add(self, slot: SlotTime):
+        self.slots.add(slot)
+        if slot.task is None:
+            self.free_slots.add(slot)
+        else:
+            self._task_minutes += slot.duration_minutes
+
+    def _replace(self, slot: SlotTime, new_slots: typing.List[SlotTime]):
+        self.slots.remove(slot)
+        self.free_slots.remove(slot)
+        for new_slot in new_slots:
+            self._add(new_slot)
+
+    def _find_free_slot(self, start: int, any_time: bool, any_after: bool) -> typing.Optional[SlotTime]:
+        if not self.free_slots:
+            return None
+        if any_time:
+            return self.free_slots[0]
+
+        index = self.free_slots.bisect_key_left(start)
+        if index > 0 and self.free_slots[index - 1].end_minute > start:
+            return self.free_slots[index - 1]
+        if index < len(self.free_slots):
+            slot = self.free_slots[index]
+            if any_after or slot.start_minute == start:
+                return slot
+        return None
+
     def total_duration(self):
-        return datetime.timedelta(seconds=sum(slot.duration.seconds for slot in self.slots if slot.task))
+        return datetime.timedelta(minutes=self._task_minutes)
+
+    @property
+    def is_exhausted(self) -> bool:
+        # Free slots are only ever consumed and new ones are only added below the day's limit,
+        # so an exhausted day stays exhausted.
+        return not self.free_slots and self._task_minutes >= self._day_minutes
 
     def add_slot(self, slot_for_add: SlotTime, can_divorce: bool, any_time=False, any_after=False):
-        logger_log_set.debug("NEED %s %s", slot_for_add.start.date(), slot_for_add)
-        for i, slot in enumerate(self.slots):
-            if slot.task is None:
-                logger_log_set.debug("\t try", slot)
-                if any_time:
-                    logger_log_set.debug("\t\t ANY")
-                    slot_for_add.set_start(slot.start)
-                    new_slots, slot_for_relocate = slot.insert(slot_for_add)
-                    self.slots[i : i + 1] = new_slots
-                    return slot_for_relocate
-
-                if any_after:
-                    logger_log_set.debug("\t\t ANY after")
-                    if slot.start >= slot_for_add.start:
-                        slot_for_add.start = slot.start
-                        new_slots, slot_for_relocate = slot.insert(slot_for_add)
-                        self.slots[i : i + 1] = new_slots
-                        return slot_for_relocate
-
-                if slot.start <= slot_for_add.start < slot.end:
-                    new_slots, slot_for_relocate = slot.insert(slot_for_add)
-                    self.slots[i : i + 1] = new_slots
-                    return slot_for_relocate
-
-        total_duration = self.total_duration()
-
-        if total_duration >= self.DEFAULT_DURATION_WORKING_DAY:
-            raise self.WorkingDayFull()
-
-        duration_available_for_day = self.DEFAULT_DURATION_WORKING_DAY - total_duration
-
-        if slot_for_add.duration > duration_available_for_day:
-            duration_additional = duration_available_for_day
-        else:
-            duration_additional = slot_for_add.duration
+        logger_log_set.debug("NEED %s %s", slot_for_add.date, slot_for_add)
+        while True:
+            slot = self._find_free_slot(slot_for_add.start_minute, any_time=any_time, any_after=any_after)
+            if slot is not None:
+                logger_log_set.debug("\t into %s", slot)
+                if any_time or slot.start_minute > slot_for_add.start_minute:
+                    slot_for_add.start_minute = slot.start_minute
+                new_slots, slot_for_relocate = slot.insert(slot_for_add)
+                self._replace(slot, new_slots)
+                return slot_for_relocate
 
-        additional_slot = SlotTime(
-            start=self.slots[-1].end,
-            duration=duration_additional,
-        )
-        self.slots.append(additional_slot)
-        return self.add_slot(slot_for_add=slot_for_add, can_divorce=can_divorce, any_time=any_time, any_after=any_after)
+            if self._task_minutes >= self._day_minutes:
+                raise self.WorkingDayFull()
+
+            last_end = self.slots[-1].end_minute
+            if not any_time and not any_after and slot_for_add.start_minute < last_end:
+                # A fixed start inside occupied time: appending free time at the end can never take it
+                raise self.SlotUnavailable(str(slot_for_add))
+
+            duration_available_for_day = self._day_minutes - self._task_minutes
+            self._add(SlotTime.from_minutes(last_end, min(slot_for_add.duration_minutes, duration_available_for_day)))
 
 
 class WorkingDaySet:
     data: typing.Dict[datetime.date, WorkingDay]
-
-    def __init__(self):
+    # Working time per date; without one every date takes 8h from 08:00 and Friday overflow moves to Monday
+    calendar: typing.Optional[WorkCalendar]
+    before_day: typing.Optional[typing.Callable[[datetime.date], None]]
+    _exhausted_dates: typing.Set[datetime.date]
+    # Slots moved to the next day whole, and slots split with the remainder moved on
+    relocations: int
+    divorces: int
+
+    def __init__(self, calendar: typing.Optional[WorkCalendar] = None):
         self.data = {}
+        self.calendar = calendar
+        # Called with a date right before a slot is placed into it
+        self.before_day = None
+        self._exhausted_dates = set()
+        self.relocations = 0
+        self.divorces = 0
 
     def __iter__(self) -> typing.Iterator[WorkingDay]:
         for date, working_day in sorted(self.data.items()):
             yield working_day
 
-    def add_slot(self, slot_for_add: SlotTime, can_divorce: bool, any_time=False, any_after=False):
-        if slot_for_add.get_relocate_duration().days > 5:
-            raise Exception("To match relocated")
-
-        date = slot_for_add.start.date()
-        if date not in self.data:
-            self.data[date] = WorkingDay(date=date)
-
-        working_day = self.data[date]
-
-        try:
-            part_for_relocate = working_day.add_slot(slot_for_add, can_divorce, any_time=any_time, any_after=any_after)
-            if part_for_relocate:
-                logger_log_set.debug("RELOCATE %s" % part_for_relocate)
-                self.add_slot(part_for_relocate, can_divorce=True, any_after=True)
-        except WorkingDay.WorkingDayFull:
-            logger_log_set.debug("WorkingDay is full. Relocating next day: %s" % slot_for_add)
-            slot_for_add.set_next_day()
-            self.add_slot(slot_for_add, can_divorce=True, any_time=True)
-            return
+    def add_slot(self, slot_for_add: SlotTime, can_divorce: bool, any_time=False, any_after=False) -> int:
+        """Place a slot, moving divorced remainders and overflow to later days.
+
+        Returns the number of relocations the slot caused.
+        """
+        relocations = 0
+        calendar = self.calendar
+        while True:
+            if calendar is None:
+                if slot_for_add.get_relocate_duration().days > 5:
+                    raise Exception("To match relocated")
+            elif slot_for_add.get_relocate_working_days(calendar) > 5:
+                raise Exception("To match relocated")
+
+            date = slot_for_add.date
+            if self.before_day:
+                self.before_day(date)
+
+            # Pinned slots keep their time on days off too; the others jump to the next working date at once
+            is_pinned = not can_divorce and not any_time and not any_after
+            skips_day_off = calendar is not None and not is_pinned and not calendar.is_available(date.toordinal())
+            if skips_day_off or date in self._exhausted_dates:
+                slot_for_add.set_next_day(calendar)
+                relocations += 1
+                self.relocations += 1
+                can_divorce, any_time, any_after = True, True, False
+                continue
+
+            if date not in self.data:
+                self.data[date] = WorkingDay(date=date, calendar=calendar)
+
+            working_day = self.data[date]
+
+            try:
+                part_for_relocate = working_day.add_slot(
+                    slot_for_add, can_divorce, any_time=any_time, any_after=any_after
+                )
+            except WorkingDay.WorkingDayFull:
+                logger_log_set.debug("WorkingDay is full. Relocating next day: %s" % slot_for_add)
+                slot_for_add.set_next_day(calendar)
+                relocations += 1
+                self.relocations += 1
+                can_divorce, any_time, any_after = True, True, False
+                continue
+            finally:
+                if working_day.is_exhausted:
+                    self._exhausted_dates.add(date)
+
+            if not part_for_relocate:
+                logger_log_set.debug("Relocations: %s", relocations)
+                return relocations
+
+            logger_log_set.debug("RELOCATE %s" % part_for_relocate)
+            slot_for_add = part_for_relocate
+            relocations += 1
+            self.divorces += 1
+            can_divorce, any_time, any_after = True, False, True
 
     def total_duration(self):
         total_duration = 0
@@ -239,13 +429,27 @@ class WorkingDaySet:
             total_duration += working_day.total_duration().seconds
         return total_duration
 
+    @staticmethod
+    def _get_log_day(working_day: WorkingDay) -> LogDay:
+        return LogDay.from_date(
+            working_day.date,
+            [
+                LogPeriod.from_minutes(
+                    slot.start_minute, slot.end_minute, slot.task.description, task_id=str(slot.task.pk)
+                )
+                for slot in working_day.slots
+                if slot.task
+            ],
+        )
+
     def get_logging(self):
         for working_day in self:
-            yield LogDay(
-                date=working_day.date.strftime("%d.%m.%Y"),
-                items=[
-                    LogPeriod(slot.start.strftime("%H:%M"), slot.end.strftime("%H:%M"), slot.task.description, task_id=str(slot.task.pk))
-                    for slot in working_day.slots
-                    if slot.task
-                ],
-            )
+            yield self._get_log_day(working_day)
+
+    def pop_logging(self, before: typing.Optional[datetime.date] = None) -> typing.Iterator[LogDay]:
+        """Yield and forget the days before `before`, or all days when it is None."""
+        for date in sorted(self.data):
+            if before is not None and date >= before:
+                return
+            self._exhausted_dates.discard(date)
+            yield self._get_log_day(self.data.pop(date))
@@ -0,0 +1,232 @@
+import datetime
+import os
+import typing
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from backends import KIMAI_URL, REDMINE_URL, SubmitBackend
+from entities import LogPeriod
+from instrumentation import tracer
+from reconcile import RemoteEntry
+
+
+class HttpBackend(SubmitBackend):
+    """Submits straight to the Kimai and Redmine JSON APIs over one keep-alive session."""
+
+    class LookupFailed(Exception):
+        pass
+
+    DEFAULT_TIMEOUT = 30.0
+    TRANSIENT_STATUS_CODES = (429, 502, 503, 504)
+    PAGE_SIZE = 100
+
+    session: requests.Session
+
+    def __init__(
+        self,
+        kimai_url: typing.Optional[str] = None,
+        redmine_url: typing.Optional[str] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        pool_size: int = 10,
+    ):
+        self.kimai_url = (kimai_url or os.environ.get("KIMAI_URL") or KIMAI_URL).rstrip("/")
+        self.redmine_url = (redmine_url or os.environ.get("REDMINE_URL") or REDMINE_URL).rstrip("/")
+        self._kimai_api_token = os.environ.get("KIMAI_API_TOKEN", "")
+        self._redmine_api_key = os.environ.get("REDMINE_API_KEY", "")
+        self._redmine_username = os.environ.get("REDMINE_USERNAME", "")
+        self._redmine_password = os.environ.get("REDMINE_PASSWORD", "")
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._kimai_headers = {}
+        self._redmine_headers = {}
+        self._redmine_auth = None
+        # Kimai ids by project name and by (project id, activity name), looked up once per session
+        self._kimai_project_ids = {}
+        self._kimai_activity_ids = {}
+
+    def _response(self, method: str, url: str, **kwargs) -> requests.Response:
+        with tracer.span("http %s" % method, category="http", url=url):
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def _request(self, method: str, url: str, **kwargs):
+        response = self._response(method, url, **kwargs)
+        if not response.content:
+            return None
+        return response.json()
+
+    def _kimai_request(self, method: str, path: str, **kwargs):
+        return self._request(method, self.kimai_url + path, headers=self._kimai_headers, **kwargs)
+
+    def _redmine_request(self, method: str, path: str, **kwargs):
+        return self._request(
+            method, self.redmine_url + path, headers=self._redmine_headers, auth=self._redmine_auth, **kwargs
+        )
+
+    def _kimai_lookup(self, path: str, name: str, **params) -> int:
+        for item in self._kimai_request("GET", path, params={"term": name, **params}):
+            if item["name"] == name:
+                return item["id"]
+        raise self.LookupFailed("Kimai %s not found: %s" % (path, name))
+
+    def kimai_login(self):
+        self._kimai_headers = {"Authorization": "Bearer %s" % self._kimai_api_token}
+        self._kimai_request("GET", "/api/version")
+
+        default = self.kimai_mapping.default
+        self._kimai_activity_id(self._kimai_project_id(default.project), default.activity)
+
+    def _kimai_project_id(self, name: str) -> int:
+        if name not in self._kimai_project_ids:
+            self._kimai_project_ids[name] = self._kimai_lookup("/api/projects", name)
+        return self._kimai_project_ids[name]
+
+    def _kimai_activity_id(self, project_id: int, name: str) -> int:
+        key = (project_id, name)
+        if key not in self._kimai_activity_ids:
+            self._kimai_activity_ids[key] = self._kimai_lookup("/api/activities", name, project=project_id)
+        return self._kimai_activity_ids[key]
+
+    def kimai_add(self, log_period: LogPeriod, format_date: str, format_time: str):
+        print(
+            "Adding...",
+            log_period.start.strftime(format_date),
+            log_period.start.strftime(format_time),
+            log_period.end.strftime(format_time),
+            log_period.description,
+        )
+        target = self.kimai_target(log_period)
+        project_id = self._kimai_project_id(target.project)
+        self._kimai_request(
+            "POST",
+            "/api/timesheets",
+            json={
+                "begin": log_period.start.strftime("%Y-%m-%dT%H:%M:%S"),
+                "end": log_period.end.strftime("%Y-%m-%dT%H:%M:%S"),
+                "project": project_id,
+                "activity": self._kimai_activity_id(project_id, target.activity),
+                "description": log_period.description,
+                "tags": ",".join(target.tags),
+            },
+        )
+
+    def redmine_login(self):
+        if self._redmine_api_key:
+            self._redmine_headers = {"X-Redmine-API-Key": self._redmine_api_key}
+        else:
+            self._redmine_auth = (self._redmine_username, self._redmine_password)
+        self._redmine_request("GET", "/users/current.json")
+
+    def redmine_add(self, log_period: LogPeriod, show_task: bool = False):
+        duration = log_period.get_duration()
+        hours = ":".join(str(duration).split(":")[:2])
+        print(
+            "Adding...",
+            log_period.task_id,
+            log_period.start,
+            log_period.start.strftime("%H:%M"),
+            log_period.end.strftime("%H:%M"),
+            log_period.description,
+        )
+
+        if show_task:
+            print("\tto #%s: %s" % (log_period.task_id, self.issue_title(log_period.task_id)))
+        else:
+            self._redmine_request(
+                "POST",
+                "/time_entries.json",
+                json={
+                    "time_entry": {
+                        "issue_id": int(log_period.task_id),
+                        "spent_on": log_period.start.strftime("%Y-%m-%d"),
+                        "hours": hours,
+                        "comments": log_period.description,
+                    }
+                },
+            )
+
+    def is_transient(self, error: Exception) -> bool:
+        # Not a read timeout: the entry may have been saved
+        if isinstance(error, requests.ConnectionError):
+            return True
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            return error.response.status_code in self.TRANSIENT_STATUS_CODES
+        return False
+
+    def redmine_issue_title(self, task_id: str) -> str:
+        return self._redmine_request("GET", "/issues/%s.json" % task_id)["issue"]["subject"]
+
+    def kimai_entries(self, date_from: datetime.date, date_to: datetime.date) -> typing.List[RemoteEntry]:
+        entries = []
+        page = 1
+        while True:
+            response = self._response(
+                "GET",
+                self.kimai_url + "/api/timesheets",
+                headers=self._kimai_headers,
+                params={
+                    "begin": date_from.strftime("%Y-%m-%dT00:00:00"),
+                    "end": date_to.strftime("%Y-%m-%dT23:59:59"),
+                    "size": self.PAGE_SIZE,
+                    "page": page,
+                },
+            )
+            for timesheet in response.json():
+                if not timesheet.get("end"):
+                    # Running timer
+                    continue
+                # Kimai adds the user's UTC offset, the entries were submitted in that local time
+                begin = datetime.datetime.fromisoformat(timesheet["begin"][:19])
+                end = datetime.datetime.fromisoformat(timesheet["end"][:19])
+                entries.append(
+                    RemoteEntry(
+                        date=begin.date(),
+                        start_minute=begin.hour * 60 + begin.minute,
+                        duration_minutes=int((end - begin).total_seconds() // 60),
+                        task_id=None,
+                        description=timesheet.get("description") or "",
+                    )
+                )
+            if page >= int(response.headers.get("X-Total-Pages", page)):
+                return entries
+            page += 1
+
+    def redmine_entries(self, date_from: datetime.date, date_to: datetime.date) -> typing.List[RemoteEntry]:
+        entries = []
+        offset = 0
+        while True:
+            data = self._redmine_request(
+                "GET",
+                "/time_entries.json",
+                params={
+                    "user_id": "me",
+                    "from": date_from.isoformat(),
+                    "to": date_to.isoformat(),
+                    "limit": self.PAGE_SIZE,
+                    "offset": offset,
+                },
+            )
+            for time_entry in data["time_entries"]:
+                entries.append(
+                    RemoteEntry(
+                        date=datetime.date.fromisoformat(time_entry["spent_on"]),
+                        start_minute=None,
+                        # Redmine keeps hours as a two decimal float
+                        duration_minutes=round(time_entry["hours"] * 60),
+                        task_id=str(time_entry["issue"]["id"]) if time_entry.get("issue") else None,
+                        description=time_entry.get("comments") or "",
+                    )
+                )
+            offset += len(data["time_entries"])
+            if not data["time_entries"] or offset >= data["total_count"]:
+                return entries
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,144 @@
+import collections
+import contextlib
+import json
+import math
+import os
+import threading
+import time
+import typing
+
+T = typing.TypeVar("T")
+
+
+class Span(typing.NamedTuple):
+    name: str
+    category: str
+    start: float
+    duration: float
+    thread_id: int
+    args: typing.Optional[dict]
+
+
+def percentile(sorted_values: typing.List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Tracer:
+    """Timed spans and counters of one run, exported as JSON lines or a Chrome trace (chrome://tracing)."""
+
+    spans: typing.List[Span]
+    counters: typing.Counter[str]
+
+    def __init__(self):
+        self.spans = []
+        self.counters = collections.Counter()
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def span(self, name: str, category: str = "step", **args):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            # list.append is atomic, spans come from the upload worker threads too
+            self.spans.append(
+                Span(name, category, started, time.perf_counter() - started, threading.get_ident(), args or None)
+            )
+
+    def timed_iter(self, name: str, iterable: typing.Iterable[T], category: str = "step") -> typing.Iterator[T]:
+        """Yield from `iterable`, recording the time spent producing the items as one span.
+
+        For lazy sources like a csv parse, whose work happens while the consumer runs: the consumer's own time
+        between the items is left out.
+        """
+        iterator = iter(iterable)
+        started = time.perf_counter()
+        duration = 0.0
+        try:
+            while True:
+                item_started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    duration += time.perf_counter() - item_started
+                yield item
+        finally:
+            self.spans.append(Span(name, category, started, duration, threading.get_ident(), None))
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] += value
+
+    def durations(self, category: typing.Optional[str] = None) -> typing.Dict[str, typing.List[float]]:
+        durations = collections.defaultdict(list)
+        for span in self.spans:
+            if category is None or span.category == category:
+                durations[span.name].append(span.duration)
+        return durations
+
+    def summary(self, category: typing.Optional[str] = None) -> str:
+        lines = ["%-32s %6s %9s %9s %9s" % ("Step", "count", "p50", "p95", "total")]
+        for name, durations in sorted(self.durations(category).items()):
+            durations.sort()
+            lines.append(
+                "%-32s %6d %8.3fs %8.3fs %8.3fs"
+                % (name, len(durations), percentile(durations, 0.5), percentile(durations, 0.95), sum(durations))
+            )
+        for name, value in sorted(self.counters.items()):
+            lines.append("%-32s %6d" % (name, value))
+        return "\n".join(lines)
+
+    def write_jsonl(self, path: str):
+        with open(path, "w", encoding="utf-8") as trace_file:
+            for span in self.spans:
+                record = span._asdict()
+                record["start"] = span.start - self.started
+                trace_file.write(json.dumps(record) + "\n")
+            for name, value in sorted(self.counters.items()):
+                trace_file.write(json.dumps({"counter": name, "value": value}) + "\n")
+
+    def write_chrome_trace(self, path: str):
+        pid = os.getpid()
+        events = [
+            {
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": (span.start - self.started) * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": span.args or {},
+            }
+            for span in self.spans
+        ]
+        if self.counters:
+            events.append(
+                {
+                    "name": "counters",
+                    "ph": "C",
+                    "ts": (time.perf_counter() - self.started) * 1e6,
+                    "pid": pid,
+                    "args": dict(self.counters),
+                }
+            )
+        with open(path, "w", encoding="utf-8") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+
+    def write(self, path: str, trace_format: str = "jsonl"):
+        match trace_format:
+            case "jsonl":
+                self.write_jsonl(path)
+            case "chrome":
+                self.write_chrome_trace(path)
+            case _:
+                raise Exception("Unknown trace format: %s" % trace_format)
+
+
+# The run's tracer, shared by main, the backends and the scheduler
+tracer = Tracer()
@@ -0,0 +1,105 @@
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+import typing
+
+from entities import LogPeriod
+
+logger_journal = logging.getLogger("journal")
+
+JournalKey = typing.Tuple[str, typing.Optional[str], str, str, str]
+
+
+def description_hash(description: str) -> str:
+    return hashlib.sha1(description.encode("utf-8")).hexdigest()
+
+
+def journal_key(platform: str, log_period: LogPeriod) -> JournalKey:
+    return (
+        platform,
+        log_period.task_id,
+        log_period.start.isoformat(),
+        log_period.end.isoformat(),
+        description_hash(log_period.description),
+    )
+
+
+class UploadJournal:
+    """Append-only JSON-lines record of submitted periods, synced to disk after every entry."""
+
+    path: str
+    keys: typing.Set[JournalKey]
+
+    def __init__(self, path: str):
+        self.path = path
+        self.keys = set()
+        self._lock = threading.Lock()
+        self._load()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        # Byte offset after the last complete line, and the unterminated last line if there is one
+        intact_size, tail = 0, b""
+        with open(self.path, "rb") as journal_file:
+            for line in journal_file:
+                if not line.endswith(b"\n"):
+                    tail = line
+                    break
+                intact_size += len(line)
+                self._add(line)
+        if tail:
+            # A run killed mid-write leaves a last line without its newline: end it when it is a whole record,
+            # cut it off otherwise, so the next record starts on a line of its own
+            if self._add(tail):
+                with open(self.path, "ab") as journal_file:
+                    journal_file.write(b"\n")
+            else:
+                os.truncate(self.path, intact_size)
+
+    def _add(self, line: bytes) -> bool:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # Not JSON, or cut inside a UTF-8 character
+            logger_journal.warning("Skipping broken journal line: %r", line)
+            return False
+        self.keys.add(
+            (record["platform"], record["task_id"], record["start"], record["end"], record["description_hash"])
+        )
+        return True
+
+    def __contains__(self, key: JournalKey):
+        return key in self.keys
+
+    def record(self, platform: str, log_period: LogPeriod):
+        key = journal_key(platform, log_period)
+        line = json.dumps(
+            {
+                "platform": key[0],
+                "task_id": key[1],
+                "start": key[2],
+                "end": key[3],
+                "description_hash": key[4],
+                "submitted_at": datetime.datetime.now().isoformat(timespec="seconds"),
+            }
+        )
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.keys.add(key)
+
+    def skip_submitted(self, platform: str, log_periods: typing.Iterable[LogPeriod]) -> typing.Iterator[LogPeriod]:
+        for log_period in log_periods:
+            if journal_key(platform, log_period) in self:
+                print("Skipping...", log_period.task_id, log_period)
+                continue
+            yield log_period
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,83 @@
+import json
+import typing
+
+KIMAI_PROJECT = "PE113.0002_SSM2"
+KIMAI_ACTIVITY = "DEV-NS"
+KIMAI_TAG = "SSM/Development"
+
+
+class KimaiTarget(typing.NamedTuple):
+    project: str
+    activity: str
+    tags: typing.Tuple[str, ...]
+
+
+DEFAULT_TARGET = KimaiTarget(project=KIMAI_PROJECT, activity=KIMAI_ACTIVITY, tags=(KIMAI_TAG,))
+
+
+class KimaiMapping:
+    """Project, activity and tags of the Kimai form per task id, with named profiles.
+
+    A JSON config looks like:
+
+        {
+            "default": "ssm",
+            "profiles": {"ssm": {"project": "PE113.0002_SSM2", "activity": "DEV-NS", "tags": ["SSM/Development"]}},
+            "tasks": {"1234": "ssm", "5678": {"project": "Other", "activity": "Meeting", "tags": []}}
+        }
+
+    A task maps to a profile name or a target of its own; missing fields are taken from the default target.
+    """
+
+    class UnknownProfile(Exception):
+        pass
+
+    default: KimaiTarget
+    profiles: typing.Dict[str, KimaiTarget]
+    tasks: typing.Dict[str, KimaiTarget]
+
+    def __init__(
+        self,
+        default: KimaiTarget = DEFAULT_TARGET,
+        profiles: typing.Optional[typing.Dict[str, KimaiTarget]] = None,
+        tasks: typing.Optional[typing.Dict[str, KimaiTarget]] = None,
+    ):
+        self.default = default
+        self.profiles = profiles or {}
+        self.tasks = tasks or {}
+
+    @classmethod
+    def load(cls, path: str, profile: typing.Optional[str] = None) -> "KimaiMapping":
+        with open(path, encoding="utf-8") as config_file:
+            config = json.load(config_file)
+
+        profiles = {}
+        for name, target in config.get("profiles", {}).items():
+            profiles[name] = cls._target(target, DEFAULT_TARGET)
+        mapping = cls(profiles=profiles)
+        mapping.default = mapping._resolve(profile or config.get("default"), DEFAULT_TARGET)
+        mapping.tasks = {
+            str(task_id): mapping._resolve(target, mapping.default)
+            for task_id, target in config.get("tasks", {}).items()
+        }
+        return mapping
+
+    @staticmethod
+    def _target(config: dict, base: KimaiTarget) -> KimaiTarget:
+        return KimaiTarget(
+            project=config.get("project", base.project),
+            activity=config.get("activity", base.activity),
+            tags=tuple(config.get("tags", base.tags)),
+        )
+
+    def _resolve(self, target: typing.Union[None, str, dict], base: KimaiTarget) -> KimaiTarget:
+        if target is None:
+            return base
+        if isinstance(target, dict):
+            return self._target(target, base)
+        if target not in self.profiles:
+            raise self.UnknownProfile("Unknown kimai profile: %s" % target)
+        return self.profiles[target]
+
+    def target(self, task_id: typing.Optional[str]) -> KimaiTarget:
+        return self.tasks.get(task_id, self.default)
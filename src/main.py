@@ -1,239 +1,390 @@
 import argparse
+import atexit
 import csv
+import functools
 import importlib
-import os
+import itertools
 import sys
 import time
 import typing
-from datetime import datetime, timedelta
-
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-
-from entities import LogDay, LogPeriod
+from datetime import date
+
+from instrumentation import tracer
+
+# CPU time of the interpreter start and the standard library imports above
+interpreter_cpu_time = time.process_time()
+
+# isort: off
+# Timed one by one for --profile_startup, dependencies first so each span is mostly that module's own cost
+with tracer.span("import work_calendar", category="startup"):
+    import work_calendar  # noqa: F401
+with tracer.span("import entities (sortedcontainers)", category="startup"):
+    from entities import MINUTES_PER_DAY, LogDay, LogPeriod, parse_time_minutes
+with tracer.span("import utils", category="startup"):
+    from utils import PeriodColumns, Validate
+with tracer.span("import archive", category="startup"):
+    from archive import LogArchive
+with tracer.span("import report", category="startup"):
+    from report import FORMATS, GROUPINGS, WRITERS, Report, write_listing
+with tracer.span("import kimai_mapping", category="startup"):
+    from kimai_mapping import KimaiMapping
+with tracer.span("import journal", category="startup"):
+    from journal import UploadJournal
+with tracer.span("import reconcile", category="startup"):
+    from reconcile import RemoteIndex, date_range
+with tracer.span("import backends", category="startup"):
+    from backends import SubmitBackend
+with tracer.span("import uploader", category="startup"):
+    from uploader import CheckFunction, SubmitFunction, SubmitResult, iter_log_periods, upload
+with tracer.span("import data_cache", category="startup"):
+    from data_cache import load_log_days
+# isort: on
+
+if typing.TYPE_CHECKING:
+    # asyncio alone takes a quarter of the import time, only --async_upload imports it
+    from async_uploader import AsyncUploadOptions
+
+
+def startup_phase(name: str) -> typing.ContextManager:
+    return tracer.span(name, category="startup")
+
+
+def print_startup_profile():
+    print("Startup profile:")
+    print("\t%8.3fs %s" % (interpreter_cpu_time, "interpreter start (CPU)"))
+    for span in tracer.spans:
+        if span.category == "startup":
+            print("\t%8.3fs %s" % (span.duration, span.name))
+    heavy_modules = [name for name in ("selenium", "requests", "asyncio") if name in sys.modules]
+    print("\tImported: %s" % (", ".join(heavy_modules) or "no selenium/requests/asyncio"))
+
+
+def check_duration(log_period: LogPeriod):
+    if log_period.duration_minutes <= 0:
+        raise ValueError("Empty period: %s" % log_period)
 
 
 class LogDataService:
-    def __init__(self):
-        self._sanecum_username = os.environ.get("SANECUM_USERNAME", "")
-        self._sanecum_password = os.environ.get("SANECUM_PASSWORD", "")
-        self._redmine_username = os.environ.get("REDMINE_USERNAME", "")
-        self._redmine_password = os.environ.get("REDMINE_PASSWORD", "")
-        chrome_options = webdriver.ChromeOptions()
-        chrome_options.add_argument("start-maximized")
-        self.driver = webdriver.Remote("http://selenium:4444/wd/hub", options=chrome_options)
-
-    def _sanecum_login(self, username, password):
-        self.driver.find_element(By.NAME, "username").send_keys(username)
-        self.driver.find_element(By.NAME, "password").send_keys(password)
-        self.driver.find_element(By.ID, "kc-form-login").submit()
-
-    def _kimai_add(self, begin_date: str, begin_time: str, end_time: str, description: str):
-        time.sleep(2)
-        self.driver.find_element(By.CLASS_NAME, "action-create").click()
-        time.sleep(2)
-
-        print("Adding...", begin_date, begin_time, end_time, description)
-        inp_begin_data = self.driver.find_element(By.ID, "timesheet_edit_form_begin_date")
-        inp_begin_data.clear()
-        inp_begin_data.send_keys(begin_date)
-
-        inp_begin_time = self.driver.find_element(By.ID, "timesheet_edit_form_begin_time")
-        inp_begin_time.clear()
-        inp_begin_time.send_keys(begin_time)
-
-        inp_end_time = self.driver.find_element(By.ID, "timesheet_edit_form_end_time")
-        inp_end_time.clear()
-        inp_end_time.send_keys(end_time)
-
-        row_project = self.driver.find_element(By.CLASS_NAME, "timesheet_edit_form_row_project")
-        select_project = row_project.find_element(By.CLASS_NAME, "col-sm-10")
-        select_project.click()
-        time.sleep(1)
-        option = self.driver.find_element(By.XPATH, '//div[text()="PE113.0002_SSM2"]')
-        option.click()
-        time.sleep(1)
-
-        row_activity = self.driver.find_element(By.CLASS_NAME, "timesheet_edit_form_row_activity")
-        select_activity = row_activity.find_element(By.CLASS_NAME, "col-sm-10")
-        select_activity.click()
-        time.sleep(1)
-        option = self.driver.find_element(By.XPATH, '//div[text()="DEV-NS"]')
-        option.click()
-
-        inp_description = self.driver.find_element(By.ID, "timesheet_edit_form_description")
-        inp_description.clear()
-        inp_description.send_keys(description)
-
-        row_tags = self.driver.find_element(By.CLASS_NAME, "timesheet_edit_form_row_tags")
-        select_tags = row_tags.find_element(By.CLASS_NAME, "col-sm-10")
-        select_tags.click()
-        time.sleep(1)
-        option = self.driver.find_element(By.XPATH, '//div[text()="SSM/Development"]')
-        self.driver.execute_script("arguments[0].scrollIntoView(true);", option)
-        time.sleep(2)
-        option.click()
-        select_tags.click()
-
-        form = self.driver.find_element(By.NAME, "timesheet_edit_form")
-        form.submit()
-
-    def do_kimai(self, data: typing.Iterable[LogDay], format_date, format_time):
-        self.driver.get("https://tracker.sanecum.io")
-        button_login = self.driver.find_element(By.ID, "social-login-button")
-        button_login.click()
-        self._sanecum_login(self._sanecum_username, self._sanecum_password)
-
-        for log_day_item in data:
-            for log_period in log_day_item.items:
-                self._kimai_add(
-                    begin_date=log_period.start.strftime(format_date),
-                    begin_time=log_period.start.strftime(format_time),
-                    end_time=log_period.end.strftime(format_time),
-                    description=log_period.description,
-                )
-
-        time.sleep(5)
-
-    def _redmine_add(
-        self, task_id: str, begin_date: datetime, begin_time: str, end_time: str, description: str, show_task=False
+    backends: typing.List[SubmitBackend]
+
+    def __init__(
+        self,
+        backend_factory: typing.Callable[[], SubmitBackend],
+        workers: int = 1,
+        journal: typing.Optional[UploadJournal] = None,
+        resume: bool = False,
+        reconcile: bool = False,
+        async_options: typing.Optional["AsyncUploadOptions"] = None,
+        kimai_mapping: typing.Optional[KimaiMapping] = None,
     ):
-        print("Adding...", task_id, begin_date, begin_time, end_time, description)
-
-        begin_time = datetime.strptime(begin_time, "%H:%M")
-        end_time = datetime.strptime(end_time, "%H:%M")
-        duration = end_time - begin_time
-        hours = ":".join(str(duration).split(":")[:2])
-        date_str = begin_date.strftime("%m%d%Y")
-
-        if show_task:
-            self.driver.get("https://red.backstage.pm/issues/%s" % task_id)
-            task_title = self.driver.find_element(By.CLASS_NAME, "subject").find_element(By.TAG_NAME, "h3").text
-            print("\tto #%s: %s" % (task_id, task_title))
-        else:
-            self.driver.get("https://red.backstage.pm/issues/%s/time_entries/new" % task_id)
-            self.driver.find_element(By.ID, "time_entry_spent_on").send_keys(date_str)
-            self.driver.find_element(By.ID, "time_entry_hours").send_keys(hours)
-            self.driver.find_element(By.ID, "time_entry_comments").send_keys(description)
-
-            self.driver.find_element(By.ID, "new_time_entry").submit()
-            time.sleep(1)
-
-    def do_redmine(self, data: typing.Iterable[LogDay], show_task: bool = False):
-        self.driver.get("https://red.backstage.pm/")
-        self.driver.find_element(By.ID, "username").send_keys(self._redmine_username)
-        self.driver.find_element(By.ID, "password").send_keys(self._redmine_password)
-        form_container = self.driver.find_element(By.ID, "login-form")
-        form_container.find_element(By.TAG_NAME, "form").submit()
-        time.sleep(2)
-
-        code = input("Two-factor authentication code: ")
-
-        self.driver.find_element(By.NAME, "twofa_code").send_keys(code.strip())
-        self.driver.find_element(By.ID, "twofa_form").submit()
-        time.sleep(2)
-
-        for log_day_item in data:
-            for log_period in log_day_item.items:
-                assert log_period.task_id
-                self._redmine_add(
-                    task_id=log_period.task_id,
-                    begin_date=log_period.start,
-                    begin_time=log_period.start.strftime("%H:%M"),
-                    end_time=log_period.end.strftime("%H:%M"),
-                    description=log_period.description,
-                    show_task=show_task,
-                )
+        self.backend_factory = backend_factory
+        self.workers = workers
+        self.journal = journal
+        self.resume = resume
+        self.reconcile = reconcile
+        self.async_options = async_options
+        self.kimai_mapping = kimai_mapping
+        self.backends = []
+        self.issue_titles = {}
+
+    def _open_sessions(self, login: typing.Callable[[SubmitBackend], None]) -> typing.List[SubmitBackend]:
+        # Log in one by one: redmine asks for a two-factor code per session.
+        while len(self.backends) < self.workers:
+            backend = self.backend_factory()
+            backend.issue_titles = self.issue_titles
+            if self.kimai_mapping:
+                backend.kimai_mapping = self.kimai_mapping
+            self.backends.append(backend)
+            with tracer.span("login", category="entry"):
+                login(backend)
+        return self.backends
+
+    @staticmethod
+    def _reconcile(
+        platform: str, backend: SubmitBackend, log_periods: typing.List[LogPeriod]
+    ) -> typing.List[LogPeriod]:
+        date_from, date_to = date_range(log_periods)
+        fetch_entries = backend.kimai_entries if platform == "kimai" else backend.redmine_entries
+        with startup_phase("fetch %s entries" % platform):
+            remote_entries = fetch_entries(date_from, date_to)
+        print("Found %s %s entries from %s to %s" % (len(remote_entries), platform, date_from, date_to))
+        return list(RemoteIndex(platform, remote_entries).missing(log_periods))
+
+    def _upload(
+        self,
+        platform: str,
+        data: typing.Iterable[LogDay],
+        login: typing.Callable[[SubmitBackend], None],
+        submit: SubmitFunction,
+        check: CheckFunction,
+    ) -> typing.List[SubmitResult]:
+        log_periods = iter_log_periods(data)
+        if self.journal and self.resume:
+            log_periods = self.journal.skip_submitted(platform, log_periods)
+
+        # Sessions are opened on the first entry to submit, after the data before it parsed fine
+        first_log_period = next(log_periods, None)
+        if first_log_period is None:
+            return []
+        log_periods = itertools.chain([first_log_period], log_periods)
+        with startup_phase("open %s sessions" % platform):
+            backends = self._open_sessions(login)
+        if self.reconcile:
+            log_periods = self._reconcile(platform, backends[0], list(log_periods))
+
+        submit_untraced = submit
+
+        def submit(backend: SubmitBackend, log_period: LogPeriod):
+            with tracer.span("%s entry" % platform, category="entry"):
+                submit_untraced(backend, log_period)
+            if self.journal is not None:
+                self.journal.record(platform, log_period)
+
+        if self.async_options:
+            from async_uploader import async_upload
+
+            return async_upload(platform, backends, log_periods, check, submit, self.async_options)
+
+        def check_and_submit(backend: SubmitBackend, log_period: LogPeriod):
+            check(log_period)
+            submit(backend, log_period)
+
+        return upload(backends, log_periods, check_and_submit)
+
+    def do_kimai(self, data: typing.Iterable[LogDay], format_date, format_time) -> typing.List[SubmitResult]:
+        def submit(backend: SubmitBackend, log_period: LogPeriod):
+            backend.kimai_add(log_period, format_date=format_date, format_time=format_time)
+
+        return self._upload("kimai", data, lambda backend: backend.kimai_login(), submit, check_duration)
+
+    def do_redmine(self, data: typing.Iterable[LogDay], show_task: bool = False) -> typing.List[SubmitResult]:
+        def submit(backend: SubmitBackend, log_period: LogPeriod):
+            backend.redmine_add(log_period, show_task=show_task)
+
+        def check(log_period: LogPeriod):
+            assert log_period.task_id
+            check_duration(log_period)
+
+        return self._upload("redmine", data, lambda backend: backend.redmine_login(), submit, check)
 
     def close(self):
-        self.driver.close()
-        self.driver.quit()
+        for backend in self.backends:
+            backend.close()
+        if self.journal:
+            self.journal.close()
 
 
-def python_import_data(module_path: str) -> typing.Iterable[LogDay]:
+def python_import_data(module_path: str, use_cache: bool = True) -> typing.Iterable[LogDay]:
     *module_parts, var_name = module_path.split(".")
     module_path = ".".join(module_parts)
 
+    if use_cache:
+        return load_log_days(module_path, var_name)
+
     module = importlib.import_module(module_path)
     return getattr(module, var_name)
 
 
+@functools.lru_cache(maxsize=1024)
+def parse_date(value: str) -> date:
+    """ "DD.MM.YYYY" without strptime, cached as exports repeat a date on every row of the day."""
+    day, month, year = value.split(".")
+    return date(int(year), int(month), int(day))
+
+
 def csv_import_data(path: str) -> typing.Iterable[LogDay]:
-    out_time_format = "%H:%M"
-    out_date_format = "%d.%m.%Y"
     with open(path) as csvfile:
         reader = csv.DictReader(csvfile)
         current_log_day = None
+        day_minute = 0
         for row in reader:
-            date_str = row["date"]
-            date = datetime.strptime(date_str, "%d.%m.%Y")
-            if not current_log_day or date.date() != current_log_day.date:
+            log_date = parse_date(row["date"])
+            if not current_log_day or log_date != current_log_day.date:
                 if current_log_day:
                     yield current_log_day
-                current_log_day = LogDay(
-                    date=datetime.strftime(date, out_date_format),
-                    items=[],
-                )
-            time_start_str = row["start"]
-            time_end_str = row["end"]
-            time_start = datetime.strptime(time_start_str, "%H:%M")
-            time_end = datetime.strptime(time_end_str, "%H:%M")
-
-            log_period = LogPeriod(
-                start=datetime.strftime(time_start, out_time_format),
-                end=datetime.strftime(time_end, out_time_format),
+                current_log_day = LogDay.from_date(log_date, items=[])
+                day_minute = log_date.toordinal() * MINUTES_PER_DAY
+
+            log_period = LogPeriod.from_minutes(
+                day_minute + parse_time_minutes(row["start"]),
+                day_minute + parse_time_minutes(row["end"]),
                 description=row["description"],
             )
-            log_period.set_date(date=date.date())
             current_log_day.items.append(log_period)
 
         if current_log_day:
             yield current_log_day
 
 
+def csv_import_data_chunks(path: str, chunk_size: int = 1000) -> typing.Iterator[typing.List[LogDay]]:
+    chunk = []
+    for log_day in csv_import_data(path):
+        chunk.append(log_day)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Example script with parameters")
-    parser.add_argument("--format", type=str, required=True, help="Input data type")
-    parser.add_argument("--platform", type=str, required=True, help="Show parsed data only")
-    parser.add_argument("--src", type=str, required=True, help="Data source path")
+    parser.add_argument("--format", type=str, help="Input data type")
+    parser.add_argument("--platform", type=str, help="Show parsed data only")
+    parser.add_argument("--src", type=str, help="Data source path")
     parser.add_argument("--show_only", action="store_true", help="Show parsed data only")
     parser.add_argument("--show_task", action="store_true", help="Show task from description")
+    parser.add_argument("--no_cache", action="store_true", help="Always import --format py modules")
+    parser.add_argument("--wait_timeout", type=float, default=None, help="Max seconds to wait for page elements")
+    parser.add_argument("--entry_budget", type=float, default=None, help="Max seconds of waiting per submitted entry")
+    parser.add_argument("--backend", type=str, default="selenium", help="Submission backend: selenium or http")
+    parser.add_argument("--workers", type=int, default=1, help="Number of parallel platform sessions")
+    parser.add_argument("--journal", type=str, default="upload_journal.jsonl", help="Submitted entries journal path")
+    parser.add_argument("--resume", action="store_true", help="Skip entries already recorded in the journal")
+    parser.add_argument(
+        "--reconcile",
+        action="store_true",
+        help="Fetch the platform's entries for the date range, submit missing only (--backend http)",
+    )
+    parser.add_argument("--validate", action="store_true", help="Check parsed data for empty and overlapping periods")
+    parser.add_argument(
+        "--profile_startup", "--profile-startup", action="store_true", help="Print import and startup time breakdown"
+    )
+    parser.add_argument("--archive", type=str, default="archive", help="Log archive directory")
+    parser.add_argument("--archive_append", action="store_true", help="Append parsed data to the archive")
+    parser.add_argument("--archive_query", action="store_true", help="Show archived time, no input data needed")
+    parser.add_argument("--date_from", type=parse_date, default=None, help="Archive query first date, DD.MM.YYYY")
+    parser.add_argument("--date_to", type=parse_date, default=None, help="Archive query last date, DD.MM.YYYY")
+    parser.add_argument("--task", type=str, default=None, help="Archive query task id")
+    parser.add_argument(
+        "--group_by", type=str, default="task", choices=("task", "date", "none"), help="Archive query grouping"
+    )
+    parser.add_argument("--report", type=str, default=None, help="Show totals by day, week, task and/or prefix")
+    parser.add_argument("--report_format", type=str, default="table", choices=FORMATS, help="Report output format")
+    parser.add_argument("--prefix_words", type=int, default=1, help="Description words grouped as the report prefix")
+    parser.add_argument("--async_upload", action="store_true", help="Submit through the asyncio pipeline")
+    parser.add_argument("--rate", type=float, default=5.0, help="Async upload: submissions per second per platform")
+    parser.add_argument("--burst", type=int, default=5, help="Async upload: submissions allowed back to back")
+    parser.add_argument("--retries", type=int, default=3, help="Async upload: retries of a transient failure")
+    parser.add_argument(
+        "--dead_letter", type=str, default="dead_letter.jsonl", help="Async upload: failed entries path"
+    )
+    parser.add_argument("--trace", type=str, default=None, help="Write timing spans and counters to this file")
+    parser.add_argument("--trace_format", type=str, default="jsonl", choices=("jsonl", "chrome"), help="Trace format")
+    parser.add_argument("--kimai_config", type=str, default=None, help="JSON mapping of tasks to kimai project")
+    parser.add_argument("--kimai_profile", type=str, default=None, help="Kimai config profile for unmapped tasks")
     args = parser.parse_args()
+    if args.rate <= 0 or args.burst < 1:
+        # The token bucket would never fill
+        parser.error("--rate must be above 0 and --burst at least 1")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.profile_startup:
+        atexit.register(print_startup_profile)
+    if args.trace:
+        atexit.register(tracer.write, args.trace, args.trace_format)
 
     # logging.basicConfig()
     # logging.getLogger().setLevel(logging.DEBUG)
 
+    if args.archive_query:
+        log_archive = LogArchive(args.archive)
+        if args.group_by == "none":
+            for record in log_archive.query(args.date_from, args.date_to, task_id=args.task):
+                print(record.date, record.to_log_period(), record.task_id)
+            sys.exit(0)
+
+        totals = log_archive.total_minutes(args.date_from, args.date_to, task_id=args.task, group_by=args.group_by)
+        for key, minutes in sorted(totals.items(), key=lambda item: str(item[0])):
+            print("%s\t%d h %02d m" % (key, *divmod(minutes, 60)))
+        print("Total: %d h %02d m" % divmod(sum(totals.values()), 60))
+        sys.exit(0)
+
+    if not (args.format and args.platform and args.src):
+        parser.error("--format, --platform and --src are required")
+    if args.reconcile and args.backend != "http":
+        # Listing the existing entries is only implemented for the JSON APIs
+        parser.error("--reconcile needs --backend http")
+
     match str(args.format):
         case "csv":
-            time_log_data = csv_import_data(args.src)
+            # Parsed while the rows are used, the span adds up the time spent in the parser
+            time_log_data = tracer.timed_iter("parse csv", csv_import_data(args.src), category="startup")
         case "py":
-            time_log_data = python_import_data(args.src)
+            with startup_phase("load data module"):
+                time_log_data = python_import_data(args.src, use_cache=not args.no_cache)
         case _:
             sys.exit("Invalid data format")
 
+    if args.archive_append:
+        print("Archived: %s periods" % LogArchive(args.archive).append(time_log_data))
+        sys.exit(0)
+
+    if args.validate:
+        columns = PeriodColumns.from_log_days(time_log_data)
+        try:
+            Validate()(columns)
+        except Validate.Invalid as e:
+            sys.exit("Invalid data: %s" % e)
+        print("Valid: %s periods" % len(columns))
+        sys.exit(0)
+
+    if args.report:
+        report_groupings = args.report.split(",")
+        if not set(report_groupings) <= set(GROUPINGS):
+            parser.error("--report takes a comma separated list of: %s" % ", ".join(GROUPINGS))
+        report = Report(report_groupings, prefix_words=args.prefix_words)
+        report.add_log_days(time_log_data)
+        WRITERS[args.report_format](report, sys.stdout)
+        sys.exit(0)
+
     if args.show_only:
-        total_duration = timedelta()
-        for log_day in time_log_data:
-            print(log_day.date, log_day.total_duration())
-            for log_item in log_day.items:
-                item_duration = log_item.get_duration()
-                print(
-                    "\t %s-%s - %s  %s %s"
-                    % (
-                        log_item.start.strftime("%H:%M"),
-                        log_item.end.strftime("%H:%M"),
-                        item_duration,
-                        log_item.task_id,
-                        log_item.description,
-                    )
-                )
-                total_duration += log_item.get_duration()
-        total_hours = int(total_duration.total_seconds() // 3600)
-        total_minutes = int((total_duration.total_seconds() % 3600) // 60)
-        print("Total: {total_hours} h {total_minutes} m".format(total_hours=total_hours, total_minutes=total_minutes))
+        write_listing(Report(()), time_log_data, sys.stdout)
         sys.exit(0)
 
-    log_data_service = LogDataService()
+    with startup_phase("import %s backend" % args.backend):
+        match str(args.backend):
+            case "selenium":
+                from selenium_backend import SeleniumBackend
+
+                def backend_factory():
+                    return SeleniumBackend(wait_timeout=args.wait_timeout, entry_budget=args.entry_budget)
+
+            case "http":
+                from http_backend import HttpBackend
+
+                backend_factory = HttpBackend
+            case _:
+                sys.exit("Invalid submission backend")
+
+    # show_task submits nothing, so there is nothing to journal
+    journal = None if args.show_task else UploadJournal(args.journal)
+    kimai_mapping = None
+    if args.kimai_config:
+        try:
+            kimai_mapping = KimaiMapping.load(args.kimai_config, profile=args.kimai_profile)
+        except KimaiMapping.UnknownProfile as e:
+            sys.exit(str(e))
+    elif args.kimai_profile:
+        parser.error("--kimai_profile needs --kimai_config")
+
+    async_options = None
+    if args.async_upload:
+        with startup_phase("import async_uploader"):
+            import async_uploader
+
+        async_options = async_uploader.AsyncUploadOptions(
+            rate=args.rate, burst=args.burst, retries=args.retries, dead_letter_path=args.dead_letter
+        )
+    log_data_service = LogDataService(
+        backend_factory,
+        workers=args.workers,
+        journal=journal,
+        resume=args.resume,
+        reconcile=args.reconcile,
+        async_options=async_options,
+        kimai_mapping=kimai_mapping,
+    )
 
     try:
         match str(args.platform):
@@ -242,10 +393,18 @@ if __name__ == "__main__":
                 time_format = "%H:%M"
                 # date_format = "%m/%d/%Y"
                 # time_format = "%I:%M %p"
-                log_data_service.do_kimai(time_log_data, format_date=date_format, format_time=time_format)
+                results = log_data_service.do_kimai(time_log_data, format_date=date_format, format_time=time_format)
             case "redmine":
-                log_data_service.do_redmine(time_log_data, args.show_task)
+                results = log_data_service.do_redmine(time_log_data, args.show_task)
             case _:
                 sys.exit("Invalid data platform")
     finally:
         log_data_service.close()
+
+    failed_results = [result for result in results if not result.ok]
+    print("Submitted: %s, failed: %s" % (len(results) - len(failed_results), len(failed_results)))
+    for result in failed_results:
+        print("\t", result)
+    print(tracer.summary())
+    if failed_results:
+        sys.exit(1)
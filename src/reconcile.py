@@ -0,0 +1,57 @@
+import collections
+import datetime
+import typing
+
+from entities import MINUTES_PER_DAY, LogPeriod
+from journal import description_hash
+
+
+class RemoteEntry(typing.NamedTuple):
+    """A time entry as a platform stores it.
+
+    Kimai keeps the start time but not the task, Redmine keeps the task and the day but not the start time,
+    so the missing field is None on both sides of the comparison.
+    """
+
+    date: datetime.date
+    start_minute: typing.Optional[int]
+    duration_minutes: int
+    task_id: typing.Optional[str]
+    description: str
+
+    @classmethod
+    def from_log_period(cls, platform: str, log_period: LogPeriod) -> "RemoteEntry":
+        day, start_minute = divmod(log_period.start_minutes, MINUTES_PER_DAY)
+        return cls(
+            date=datetime.date.fromordinal(day),
+            start_minute=start_minute if platform == "kimai" else None,
+            duration_minutes=log_period.duration_minutes,
+            task_id=log_period.task_id if platform == "redmine" else None,
+            description=log_period.description,
+        )
+
+    def key(self) -> tuple:
+        return self.date, self.start_minute, self.duration_minutes, self.task_id, description_hash(self.description)
+
+
+def date_range(log_periods: typing.Iterable[LogPeriod]) -> typing.Tuple[datetime.date, datetime.date]:
+    days = [log_period.start_minutes // MINUTES_PER_DAY for log_period in log_periods]
+    return datetime.date.fromordinal(min(days)), datetime.date.fromordinal(max(days))
+
+
+class RemoteIndex:
+    """Multiset of the entries already on a platform, keyed by date, time, task and description hash."""
+
+    def __init__(self, platform: str, entries: typing.Iterable[RemoteEntry]):
+        self.platform = platform
+        self.counts = collections.Counter(entry.key() for entry in entries)
+
+    def missing(self, log_periods: typing.Iterable[LogPeriod]) -> typing.Iterator[LogPeriod]:
+        """Periods without a remote entry; each remote entry matches one period at most."""
+        for log_period in log_periods:
+            key = RemoteEntry.from_log_period(self.platform, log_period).key()
+            if self.counts[key] > 0:
+                self.counts[key] -= 1
+                print("Already on %s..." % self.platform, log_period.task_id, log_period)
+                continue
+            yield log_period
@@ -0,0 +1,137 @@
+import csv
+import datetime
+import json
+import typing
+
+from entities import MINUTES_PER_DAY, LogDay, LogPeriod
+
+GROUPINGS = ("day", "week", "task", "prefix")
+FORMATS = ("table", "csv", "json")
+
+
+def format_minutes(minutes: int) -> str:
+    return "%d:%02d" % divmod(minutes, 60)
+
+
+def format_clock(minute: int) -> str:
+    return "%02d:%02d" % divmod(minute % MINUTES_PER_DAY, 60)
+
+
+def description_prefix(description: str, words: int = 1) -> str:
+    return " ".join(description.split()[:words]).rstrip(":,.-")
+
+
+class Aggregate:
+    __slots__ = ("minutes", "periods")
+
+    def __init__(self):
+        self.minutes = 0
+        self.periods = 0
+
+
+class Report:
+    """Running totals per day, ISO week, task and description prefix, updated as log days stream through.
+
+    Only one Aggregate per group key is kept, the log days themselves are not.
+    """
+
+    group_by: typing.List[str]
+    groups: typing.Dict[str, typing.Dict[str, Aggregate]]
+
+    def __init__(self, group_by: typing.Iterable[str] = GROUPINGS, prefix_words: int = 1):
+        self.group_by = list(group_by)
+        for grouping in self.group_by:
+            if grouping not in GROUPINGS:
+                raise Exception("Unknown report grouping: %s" % grouping)
+        self.prefix_words = prefix_words
+        self.groups = {grouping: {} for grouping in self.group_by}
+        self.total = Aggregate()
+
+    def _add(self, grouping: str, key: str, minutes: int):
+        aggregate = self.groups[grouping].get(key)
+        if aggregate is None:
+            aggregate = self.groups[grouping][key] = Aggregate()
+        aggregate.minutes += minutes
+        aggregate.periods += 1
+
+    def add_period(self, date: datetime.date, log_period: LogPeriod) -> int:
+        minutes = log_period.duration_minutes
+        self.total.minutes += minutes
+        self.total.periods += 1
+        for grouping in self.group_by:
+            match grouping:
+                case "day":
+                    key = date.isoformat()
+                case "week":
+                    year, week, _ = date.isocalendar()
+                    key = "%d-W%02d" % (year, week)
+                case "task":
+                    key = log_period.task_id or "-"
+                case "prefix":
+                    key = description_prefix(log_period.description, self.prefix_words)
+            self._add(grouping, key, minutes)
+        return minutes
+
+    def add_log_day(self, log_day: LogDay) -> int:
+        return sum(self.add_period(log_day.date, log_period) for log_period in log_day.items)
+
+    def add_log_days(self, log_days: typing.Iterable[LogDay]):
+        for log_day in log_days:
+            self.add_log_day(log_day)
+
+    def rows(self) -> typing.Iterator[typing.Tuple[str, str, int, int]]:
+        for grouping in self.group_by:
+            for key, aggregate in sorted(self.groups[grouping].items()):
+                yield grouping, key, aggregate.minutes, aggregate.periods
+
+
+def write_listing(report: Report, log_days: typing.Iterable[LogDay], out: typing.TextIO):
+    """The --show_only listing: every period under its day, then the total."""
+    for log_day in log_days:
+        lines = []
+        day_minutes = 0
+        for log_period in log_day.items:
+            minutes = report.add_period(log_day.date, log_period)
+            day_minutes += minutes
+            lines.append(
+                "\t %s-%s - %s  %s %s"
+                % (
+                    format_clock(log_period.start_minutes),
+                    format_clock(log_period.end_minutes),
+                    datetime.timedelta(minutes=minutes),
+                    log_period.task_id,
+                    log_period.description,
+                )
+            )
+        print(log_day.date, datetime.timedelta(minutes=day_minutes), file=out)
+        for line in lines:
+            print(line, file=out)
+    print("Total: %d h %d m" % divmod(report.total.minutes, 60), file=out)
+
+
+def write_table(report: Report, out: typing.TextIO):
+    for grouping in report.group_by:
+        print("By %s:" % grouping, file=out)
+        for key, aggregate in sorted(report.groups[grouping].items()):
+            print("\t%-30s %8s %6d" % (key, format_minutes(aggregate.minutes), aggregate.periods), file=out)
+    print("Total: %d h %d m in %d periods" % (*divmod(report.total.minutes, 60), report.total.periods), file=out)
+
+
+def write_csv(report: Report, out: typing.TextIO):
+    writer = csv.writer(out)
+    writer.writerow(["group", "key", "minutes", "hours", "periods"])
+    for grouping, key, minutes, periods in report.rows():
+        writer.writerow([grouping, key, minutes, format_minutes(minutes), periods])
+    writer.writerow(["total", "", report.total.minutes, format_minutes(report.total.minutes), report.total.periods])
+
+
+def write_json(report: Report, out: typing.TextIO):
+    data = {grouping: {} for grouping in report.group_by}
+    for grouping, key, minutes, periods in report.rows():
+        data[grouping][key] = {"minutes": minutes, "periods": periods}
+    data["total"] = {"minutes": report.total.minutes, "periods": report.total.periods}
+    json.dump(data, out, indent=2)
+    print(file=out)
+
+
+WRITERS = {"table": write_table, "csv": write_csv, "json": write_json}
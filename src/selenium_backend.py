@@ -0,0 +1,201 @@
+import os
+import typing
+from datetime import datetime
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+
+from backends import KIMAI_URL, REDMINE_URL, SubmitBackend
+from entities import LogPeriod
+from instrumentation import tracer
+from kimai_mapping import KimaiTarget
+from waits import PageWaiter
+
+# Selects the options with the given values on a native <select> and lets the page react as to a user pick
+SELECT_VALUES_SCRIPT = """
+const select = arguments[0];
+for (const option of select.options) {
+    option.selected = arguments[1].includes(option.value);
+}
+select.dispatchEvent(new Event("change", {bubbles: true}));
+"""
+OPTION_VALUE_SCRIPT = """
+const option = Array.from(arguments[0].options).find(option => option.text.trim() === arguments[1]);
+return option ? option.value : null;
+"""
+
+
+class SeleniumBackend(SubmitBackend):
+    def __init__(self, wait_timeout: typing.Optional[float] = None, entry_budget: typing.Optional[float] = None):
+        self._sanecum_username = os.environ.get("SANECUM_USERNAME", "")
+        self._sanecum_password = os.environ.get("SANECUM_PASSWORD", "")
+        self._redmine_username = os.environ.get("REDMINE_USERNAME", "")
+        self._redmine_password = os.environ.get("REDMINE_PASSWORD", "")
+        chrome_options = webdriver.ChromeOptions()
+        chrome_options.add_argument("start-maximized")
+        self.driver = webdriver.Remote("http://selenium:4444/wd/hub", options=chrome_options)
+        if wait_timeout is None:
+            wait_timeout = PageWaiter.DEFAULT_TIMEOUT
+        self.waiter = PageWaiter(self.driver, timeout=wait_timeout, entry_budget=entry_budget)
+        # Option values of the kimai form selects by field and option names, found once per session
+        self._kimai_option_values = {}
+
+    def _sanecum_login(self, username, password):
+        with tracer.span("sanecum login"):
+            self.waiter.visible(By.NAME, "username").send_keys(username)
+            self.driver.find_element(By.NAME, "password").send_keys(password)
+            self.driver.find_element(By.ID, "kc-form-login").submit()
+
+    def _kimai_choose(self, field: str, names: typing.Tuple[str, ...], cache_key: tuple, multiple: bool = False):
+        """Pick form select options by their cached values, or through the dropdown widget the first time."""
+        select_id = "timesheet_edit_form_%s" % field
+        values = self._kimai_option_values.get(cache_key)
+        if values is not None:
+            select = self.driver.find_element(By.ID, select_id)
+            self.waiter.until("%s enabled" % field, lambda driver: select.is_enabled())
+            for value in values:
+                self.waiter.present(By.CSS_SELECTOR, '#%s option[value="%s"]' % (select_id, value))
+            self.driver.execute_script(SELECT_VALUES_SCRIPT, select, values)
+            return
+
+        row = self.driver.find_element(By.CLASS_NAME, "timesheet_edit_form_row_%s" % field)
+        widget = row.find_element(By.CLASS_NAME, "col-sm-10")
+        self.waiter.until("%s enabled" % field, lambda driver: widget.is_enabled())
+        widget.click()
+        for name in names:
+            if multiple:
+                option = self.waiter.present(By.XPATH, '//div[text()="%s"]' % name)
+                self.driver.execute_script("arguments[0].scrollIntoView(true);", option)
+            self.waiter.option(name).click()
+        if multiple:
+            widget.click()
+
+        # Not cached when the widget is not backed by a native select
+        selects = self.driver.find_elements(By.ID, select_id)
+        if not selects:
+            return
+        values = [self.driver.execute_script(OPTION_VALUE_SCRIPT, selects[0], name) for name in names]
+        if None not in values:
+            self._kimai_option_values[cache_key] = values
+
+    def _kimai_add(self, begin_date: str, begin_time: str, end_time: str, description: str, target: KimaiTarget):
+        with tracer.span("kimai open form"):
+            self.waiter.clickable(By.CLASS_NAME, "action-create").click()
+
+            print("Adding...", begin_date, begin_time, end_time, description)
+            inp_begin_data = self.waiter.visible(By.ID, "timesheet_edit_form_begin_date")
+
+        with tracer.span("kimai fill times"):
+            inp_begin_data.clear()
+            inp_begin_data.send_keys(begin_date)
+
+            inp_begin_time = self.driver.find_element(By.ID, "timesheet_edit_form_begin_time")
+            inp_begin_time.clear()
+            inp_begin_time.send_keys(begin_time)
+
+            inp_end_time = self.driver.find_element(By.ID, "timesheet_edit_form_end_time")
+            inp_end_time.clear()
+            inp_end_time.send_keys(end_time)
+
+        with tracer.span("kimai project dropdown"):
+            self._kimai_choose("project", (target.project,), ("project", target.project))
+
+        with tracer.span("kimai activity dropdown"):
+            self._kimai_choose("activity", (target.activity,), ("activity", target.project, target.activity))
+
+        with tracer.span("kimai fill description"):
+            inp_description = self.driver.find_element(By.ID, "timesheet_edit_form_description")
+            inp_description.clear()
+            inp_description.send_keys(description)
+
+        if target.tags:
+            with tracer.span("kimai tags dropdown"):
+                self._kimai_choose("tags", target.tags, ("tags",) + target.tags, multiple=True)
+
+        with tracer.span("kimai submit"):
+            form = self.driver.find_element(By.NAME, "timesheet_edit_form")
+            form.submit()
+            self.waiter.gone("timesheet form", form)
+
+    def kimai_login(self):
+        with tracer.span("kimai open login"):
+            self.driver.get(KIMAI_URL)
+            button_login = self.waiter.clickable(By.ID, "social-login-button")
+            button_login.click()
+        self._sanecum_login(self._sanecum_username, self._sanecum_password)
+
+    def kimai_add(self, log_period: LogPeriod, format_date: str, format_time: str):
+        with self.waiter.entry():
+            self._kimai_add(
+                begin_date=log_period.start.strftime(format_date),
+                begin_time=log_period.start.strftime(format_time),
+                end_time=log_period.end.strftime(format_time),
+                description=log_period.description,
+                target=self.kimai_target(log_period),
+            )
+
+    def _redmine_add(
+        self, task_id: str, begin_date: datetime, begin_time: str, end_time: str, description: str, show_task=False
+    ):
+        print("Adding...", task_id, begin_date, begin_time, end_time, description)
+
+        begin_time = datetime.strptime(begin_time, "%H:%M")
+        end_time = datetime.strptime(end_time, "%H:%M")
+        duration = end_time - begin_time
+        hours = ":".join(str(duration).split(":")[:2])
+        date_str = begin_date.strftime("%m%d%Y")
+
+        if show_task:
+            print("\tto #%s: %s" % (task_id, self.issue_title(task_id)))
+        else:
+            with tracer.span("redmine open form"):
+                self.driver.get(REDMINE_URL + "/issues/%s/time_entries/new" % task_id)
+                inp_spent_on = self.waiter.visible(By.ID, "time_entry_spent_on")
+
+            with tracer.span("redmine fill form"):
+                inp_spent_on.send_keys(date_str)
+                self.driver.find_element(By.ID, "time_entry_hours").send_keys(hours)
+                self.driver.find_element(By.ID, "time_entry_comments").send_keys(description)
+
+            with tracer.span("redmine submit"):
+                form = self.driver.find_element(By.ID, "new_time_entry")
+                form.submit()
+                self.waiter.stale("time entry form", form)
+
+    def redmine_login(self):
+        with tracer.span("redmine login"):
+            self.driver.get(REDMINE_URL + "/")
+            self.driver.find_element(By.ID, "username").send_keys(self._redmine_username)
+            self.driver.find_element(By.ID, "password").send_keys(self._redmine_password)
+            form_container = self.driver.find_element(By.ID, "login-form")
+            form_container.find_element(By.TAG_NAME, "form").submit()
+            inp_twofa_code = self.waiter.visible(By.NAME, "twofa_code")
+
+        code = input("Two-factor authentication code: ")
+
+        with tracer.span("redmine two-factor"):
+            inp_twofa_code.send_keys(code.strip())
+            form_twofa = self.driver.find_element(By.ID, "twofa_form")
+            form_twofa.submit()
+            self.waiter.stale("twofa form", form_twofa)
+
+    def redmine_issue_title(self, task_id: str) -> str:
+        with tracer.span("redmine issue title"):
+            self.driver.get(REDMINE_URL + "/issues/%s" % task_id)
+            return self.waiter.present(By.CLASS_NAME, "subject").find_element(By.TAG_NAME, "h3").text
+
+    def redmine_add(self, log_period: LogPeriod, show_task: bool = False):
+        with self.waiter.entry():
+            self._redmine_add(
+                task_id=log_period.task_id,
+                begin_date=log_period.start,
+                begin_time=log_period.start.strftime("%H:%M"),
+                end_time=log_period.end.strftime("%H:%M"),
+                description=log_period.description,
+                show_task=show_task,
+            )
+
+    def close(self):
+        print(self.waiter.summary())
+        self.driver.close()
+        self.driver.quit()
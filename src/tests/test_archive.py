@@ -0,0 +1,39 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+from archive import LogArchive
+from entities import MINUTES_PER_DAY, LogDay, LogPeriod
+
+
+class LogArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "archive")
+
+    def test_query_creates_no_files(self):
+        log_archive = LogArchive(self.path)
+        self.assertEqual(list(log_archive.query()), [])
+        self.assertEqual(log_archive.total_minutes(group_by="date"), {})
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_append_and_query(self):
+        date = datetime.date(2025, 1, 2)
+        day_minute = date.toordinal() * MINUTES_PER_DAY
+        periods = [
+            LogPeriod.from_minutes(day_minute + 9 * 60, day_minute + 10 * 60, "Fix", task_id="5"),
+            LogPeriod.from_minutes(day_minute + 10 * 60, day_minute + 10 * 60 + 30, "Meeting"),
+        ]
+        self.assertEqual(LogArchive(self.path).append([LogDay.from_date(date, periods)]), 2)
+        log_archive = LogArchive(self.path)
+        self.assertEqual(
+            [(record.task_id, record.duration_minutes, record.description) for record in log_archive.query()],
+            [("5", 60, "Fix"), (None, 30, "Meeting")],
+        )
+        self.assertEqual(log_archive.total_minutes(task_id="5"), {"5": 60})
+
+
+if __name__ == "__main__":
+    unittest.main()
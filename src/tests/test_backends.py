@@ -0,0 +1,56 @@
+import threading
+import unittest
+
+from backends import SubmitBackend
+
+
+class TitleBackend(SubmitBackend):
+    """Looks issue titles up by waiting for the test to release them."""
+
+    def __init__(self, issue_titles: dict, released: dict, lookups: list):
+        self.issue_titles = issue_titles
+        self.released = released
+        self.lookups = lookups
+
+    def redmine_issue_title(self, task_id: str) -> str:
+        self.lookups.append(task_id)
+        if not self.released[task_id].wait(timeout=5):
+            raise TimeoutError(task_id)
+        return "Title %s" % task_id
+
+
+class IssueTitleTest(unittest.TestCase):
+    def setUp(self):
+        self.issue_titles = {}
+        self.released = {task_id: threading.Event() for task_id in ("1", "2")}
+        self.lookups = []
+        self.results = {}
+
+    def look_up(self, name: str, task_id: str) -> threading.Thread:
+        backend = TitleBackend(self.issue_titles, self.released, self.lookups)
+        thread = threading.Thread(target=lambda: self.results.__setitem__(name, backend.issue_title(task_id)))
+        thread.start()
+        return thread
+
+    def test_other_issue_not_blocked(self):
+        slow = self.look_up("slow", "1")
+        fast = self.look_up("fast", "2")
+        self.released["2"].set()
+        fast.join(timeout=5)
+        # Issue 2 is answered while the lookup of issue 1 still waits
+        self.assertEqual(self.results, {"fast": "Title 2"})
+        self.released["1"].set()
+        slow.join(timeout=5)
+        self.assertEqual(self.results["slow"], "Title 1")
+
+    def test_same_issue_looked_up_once(self):
+        threads = [self.look_up(name, "1") for name in ("first", "second", "third")]
+        self.released["1"].set()
+        for thread in threads:
+            thread.join(timeout=5)
+        self.assertEqual(self.lookups, ["1"])
+        self.assertEqual(set(self.results.values()), {"Title 1"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import data_cache
+
+MODULE = """
+import json
+import os
+
+from entities import LogPeriod, LogDay
+from cache_test_data.helper import HOURS
+
+with open(os.path.join(os.path.dirname(__file__), "hours.json")) as hours_file:
+    FACTOR = json.load(hours_file)["factor"]
+
+log_days = [LogDay("02.01", [LogPeriod("9:00", "%d:00" % (9 + HOURS * FACTOR), "Work")])]
+"""
+
+
+class LoadLogDaysTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.package = os.path.join(self.directory.name, "cache_test_data")
+        os.mkdir(self.package)
+        self.write("__init__.py", "")
+        self.write("log.py", MODULE)
+        self.write("helper.py", "HOURS = 1\n")
+        self.write("hours.json", json.dumps({"factor": 2}))
+        sys.path.insert(0, self.directory.name)
+        patch = mock.patch.object(data_cache, "SOURCE_ROOT", self.directory.name)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.forget()
+        sys.path.remove(self.directory.name)
+        self.directory.cleanup()
+
+    def write(self, name: str, content: str):
+        with open(os.path.join(self.package, name), "w") as source_file:
+            source_file.write(content)
+
+    def forget(self):
+        for name in [name for name in sys.modules if name.startswith("cache_test_data")]:
+            del sys.modules[name]
+
+    def load_hours(self) -> float:
+        [log_day] = data_cache.load_log_days("cache_test_data.log", "log_days")
+        return log_day.items[0].duration_minutes / 60
+
+    def test_cached_until_a_dependency_changes(self):
+        self.assertEqual(self.load_hours(), 2)
+        self.forget()
+        self.assertEqual(self.load_hours(), 2)
+        self.assertNotIn("cache_test_data.log", sys.modules)
+
+        self.write("helper.py", "HOURS = 2\n")
+        self.assertEqual(self.load_hours(), 4)
+
+        self.forget()
+        self.write("hours.json", json.dumps({"factor": 3}))
+        self.assertEqual(self.load_hours(), 6)
+
+    def test_module_outside_source_root(self):
+        with mock.patch.object(data_cache, "SOURCE_ROOT", os.path.join(self.directory.name, "src")):
+            self.assertEqual(self.load_hours(), 2)
+            self.forget()
+            self.write("log.py", MODULE.replace("HOURS * FACTOR", "3 * HOURS * FACTOR"))
+            # Only the module itself is tracked out there
+            self.assertEqual(self.load_hours(), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
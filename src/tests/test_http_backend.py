@@ -0,0 +1,145 @@
+import datetime
+import http.server
+import json
+import threading
+import unittest
+import urllib.parse
+
+import requests
+
+from entities import LogPeriod
+from http_backend import HttpBackend
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    """Answers the Kimai and Redmine API paths the backend uses, recording every request on the server."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, data, status: int = 200, headers: dict = None):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        self.server.requests.append(("GET", url.path, query, dict(self.headers)))
+        match url.path:
+            case "/api/projects":
+                self._send([{"id": 1, "name": "Other"}, {"id": 3, "name": "PE113.0002_SSM2"}])
+            case "/api/activities":
+                self._send([{"id": 7, "name": "DEV-NS"}])
+            case "/api/timesheets":
+                page = int(query["page"])
+                timesheets = [
+                    [{"begin": "2025-01-02T09:00:00+0100", "end": "2025-01-02T09:30:00+0100", "description": "A"}],
+                    [{"begin": "2025-01-03T10:00:00+0100", "end": None, "description": "Running"}],
+                ]
+                self._send(timesheets[page - 1], headers={"X-Total-Pages": "2"})
+            case "/time_entries.json":
+                self._send(
+                    {
+                        "time_entries": [
+                            {"spent_on": "2025-01-02", "hours": 0.33, "issue": {"id": 5}, "comments": "B"}
+                        ],
+                        "total_count": 1,
+                    }
+                )
+            case "/issues/5.json":
+                self._send({"issue": {"subject": "Issue five"}})
+            case "/unavailable":
+                self._send({}, status=503)
+            case _:
+                self._send({})
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(("POST", self.path, body, dict(self.headers)))
+        self._send({"id": len(self.server.requests)}, status=201)
+
+
+class HttpBackendTest(unittest.TestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        url = "http://127.0.0.1:%s" % self.server.server_address[1]
+        self.backend = HttpBackend(kimai_url=url, redmine_url=url)
+
+    def tearDown(self):
+        self.backend.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def requests_to(self, method: str, path: str) -> list:
+        return [request for request in self.server.requests if request[:2] == (method, path)]
+
+    def test_kimai_add(self):
+        self.backend.kimai_login()
+        day_minute = datetime.date(2025, 1, 2).toordinal() * 24 * 60
+        self.backend.kimai_add(
+            LogPeriod.from_minutes(day_minute + 9 * 60, day_minute + 10 * 60, "Work"),
+            format_date="%d.%m.%Y",
+            format_time="%H:%M",
+        )
+        [(_, _, body, _)] = self.requests_to("POST", "/api/timesheets")
+        self.assertEqual(
+            body,
+            {
+                "begin": "2025-01-02T09:00:00",
+                "end": "2025-01-02T10:00:00",
+                "project": 3,
+                "activity": 7,
+                "description": "Work",
+                "tags": "SSM/Development",
+            },
+        )
+        # Looked up once at login, then taken from the session
+        self.assertEqual(len(self.requests_to("GET", "/api/projects")), 1)
+
+    def test_redmine_add(self):
+        self.backend.redmine_login()
+        day_minute = datetime.date(2025, 1, 2).toordinal() * 24 * 60
+        self.backend.redmine_add(LogPeriod.from_minutes(day_minute + 9 * 60, day_minute + 10 * 60 + 30, "Fix", "5"))
+        [(_, _, body, _)] = self.requests_to("POST", "/time_entries.json")
+        self.assertEqual(
+            body, {"time_entry": {"issue_id": 5, "spent_on": "2025-01-02", "hours": "1:30", "comments": "Fix"}}
+        )
+
+    def test_issue_title(self):
+        self.backend.redmine_login()
+        self.assertEqual(self.backend.issue_title("5"), "Issue five")
+
+    def test_kimai_entries(self):
+        self.backend.kimai_login()
+        entries = self.backend.kimai_entries(datetime.date(2025, 1, 1), datetime.date(2025, 1, 31))
+        # Both pages read, the running timer left out
+        self.assertEqual([query["page"] for _, _, query, _ in self.requests_to("GET", "/api/timesheets")], ["1", "2"])
+        self.assertEqual(
+            [(entry.date, entry.start_minute, entry.duration_minutes) for entry in entries],
+            [(datetime.date(2025, 1, 2), 9 * 60, 30)],
+        )
+
+    def test_redmine_entries(self):
+        self.backend.redmine_login()
+        [entry] = self.backend.redmine_entries(datetime.date(2025, 1, 1), datetime.date(2025, 1, 31))
+        self.assertEqual((entry.task_id, entry.duration_minutes, entry.description), ("5", 20, "B"))
+
+    def test_is_transient(self):
+        with self.assertRaises(requests.HTTPError) as context:
+            self.backend._request("GET", self.backend.kimai_url + "/unavailable")
+        self.assertTrue(self.backend.is_transient(context.exception))
+        self.assertFalse(self.backend.is_transient(requests.ReadTimeout()))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import time
+import unittest
+
+from instrumentation import Tracer, percentile
+
+
+class PercentileTest(unittest.TestCase):
+    def test_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.95), 95)
+        self.assertEqual(percentile(values, 1.0), 100)
+        self.assertEqual(percentile(values, 0.0), 1)
+        self.assertEqual(percentile(list(range(1, 21)), 0.95), 19)
+        self.assertEqual(percentile([1, 2], 0.5), 1)
+        self.assertEqual(percentile([7], 0.95), 7)
+
+
+class TimedIterTest(unittest.TestCase):
+    def test_consumer_time_left_out(self):
+        def slow_source():
+            for value in range(3):
+                time.sleep(0.02)
+                yield value
+
+        tracer = Tracer()
+        for _ in tracer.timed_iter("parse", slow_source()):
+            time.sleep(0.05)
+        [span] = tracer.spans
+        self.assertEqual(span.name, "parse")
+        self.assertGreaterEqual(span.duration, 0.06)
+        self.assertLess(span.duration, 0.15)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+from entities import LogPeriod
+from journal import UploadJournal, journal_key
+
+
+def period(hour: int) -> LogPeriod:
+    day_minute = datetime.date(2025, 1, 2).toordinal() * 24 * 60
+    return LogPeriod.from_minutes(day_minute + hour * 60, day_minute + (hour + 1) * 60, "Work", "5")
+
+
+class UploadJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "journal.jsonl")
+
+    def record(self, *hours: int):
+        journal = UploadJournal(self.path)
+        for hour in hours:
+            journal.record("kimai", period(hour))
+        journal.close()
+
+    def keys(self) -> set:
+        journal = UploadJournal(self.path)
+        journal.close()
+        return journal.keys
+
+    def test_torn_last_line(self):
+        self.record(9)
+        with open(self.path, "a", encoding="utf-8") as journal_file:
+            journal_file.write('{"platform": "kimai", "task_')
+        self.record(10)
+        self.assertEqual(self.keys(), {journal_key("kimai", period(9)), journal_key("kimai", period(10))})
+
+    def test_last_line_without_newline(self):
+        self.record(9)
+        with open(self.path, "rb+") as journal_file:
+            journal_file.truncate(os.path.getsize(self.path) - 1)
+        self.record(10)
+        self.assertEqual(self.keys(), {journal_key("kimai", period(9)), journal_key("kimai", period(10))})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import datetime
+import random
+import typing
+import unittest
+
+from entities import MINUTES_PER_DAY, LogDay, LogPeriod
+from utils import Scale, Schedule, double_time, double_time_parallel, double_time_stream, transform
+
+SKIP_TASK = "skip"
+
+
+def random_log_days(rnd: random.Random, max_periods: int = 6, max_duration: int = 8) -> typing.List[LogDay]:
+    """Date sorted input around a year change, with weekends, repeated dates and pinned periods."""
+    log_days = []
+    date = datetime.date(2025, 12, 1) + datetime.timedelta(days=rnd.randint(0, 20))
+    for _ in range(rnd.randint(1, 30)):
+        date += datetime.timedelta(days=rnd.choice([0, 1, 1, 1, 2, 3]))
+        day_minute = date.toordinal() * MINUTES_PER_DAY
+        start = rnd.randint(8 * 4, 11 * 4) * 15
+        items = []
+        for index in range(rnd.randint(0, max_periods)):
+            duration = rnd.randint(1, max_duration) * 15
+            if start + duration > 20 * 60:
+                break
+            task_id = SKIP_TASK if rnd.random() < 0.25 else str(rnd.randint(1, 5))
+            items.append(
+                LogPeriod.from_minutes(
+                    day_minute + start, day_minute + start + duration, "Period %s" % index, task_id=task_id
+                )
+            )
+            start += duration + rnd.choice([0, 0, 15, 30])
+        log_days.append(LogDay.from_date(date, items))
+    return log_days
+
+
+def outcome(schedule: typing.Callable[[], typing.Iterable[LogDay]]):
+    """The scheduled periods per date, or None when scheduling fails.
+
+    Overloaded input fails with every scheduler, but the order of placement decides which error comes first.
+    """
+    try:
+        return [
+            (log_day.date, [(p.start_minutes, p.end_minutes, p.task_id, p.description) for p in log_day.items])
+            for log_day in schedule()
+        ]
+    except Exception:
+        return None
+
+
+class DoubleTimeEquivalenceTest(unittest.TestCase):
+    """The other schedulers against double_time on random input."""
+
+    CASES = 300
+
+    def assert_same(self, schedule: typing.Callable[[typing.List[LogDay]], typing.Iterable[LogDay]], cases: int):
+        for seed in range(cases):
+            with self.subTest(seed=seed):
+                log_days = random_log_days(random.Random(seed))
+                self.assertEqual(outcome(lambda: schedule(log_days)), outcome(lambda: double_time(log_days, SKIP_TASK)))
+
+    def test_stream(self):
+        self.assert_same(lambda log_days: double_time_stream(iter(log_days), SKIP_TASK), self.CASES)
+
+    def test_transform(self):
+        stages = [Scale({SKIP_TASK: 1}, default=2), Schedule(pinned_task_ids=[SKIP_TASK])]
+        self.assert_same(lambda log_days: transform(log_days, stages), self.CASES)
+
+    def test_parallel(self):
+        # A process pool per case: fewer cases, more periods each, so shards get merged too
+        for seed in range(40):
+            with self.subTest(seed=seed):
+                rnd = random.Random(seed)
+                log_days = random_log_days(rnd, max_periods=10)
+                workers = rnd.choice([2, 3, 8])
+                self.assertEqual(
+                    outcome(lambda: double_time_parallel(log_days, SKIP_TASK, workers=workers)),
+                    outcome(lambda: double_time(log_days, SKIP_TASK)),
+                )
+
+    def test_not_only_errors(self):
+        # The input must mostly schedule, or the comparisons above prove little
+        results = [outcome(lambda: double_time(random_log_days(random.Random(seed)), SKIP_TASK)) for seed in range(100)]
+        self.assertGreater(sum(result is not None for result in results), 70)
+
+
+if __name__ == "__main__":
+    unittest.main()
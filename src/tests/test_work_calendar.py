@@ -0,0 +1,123 @@
+import datetime
+import json
+import os
+import random
+import tempfile
+import unittest
+
+from entities import MINUTES_PER_DAY, LogDay, LogPeriod
+from tests.test_scheduling import SKIP_TASK, outcome, random_log_days
+from utils import double_time
+from work_calendar import DayCapacity, WorkCalendar
+
+WEEKDAYS = [DayCapacity(8 * 60, 8 * 60)] * 5 + [DayCapacity(8 * 60, 0)] * 2
+
+
+def period(date: datetime.date, start: int, end: int, task_id: str, description: str = "Work") -> LogPeriod:
+    day_minute = date.toordinal() * MINUTES_PER_DAY
+    return LogPeriod.from_minutes(day_minute + start, day_minute + end, description, task_id=task_id)
+
+
+def clock(log_day: LogDay) -> list:
+    return ["%s-%s" % (p.start.strftime("%H:%M"), p.end.strftime("%H:%M")) for p in log_day.items]
+
+
+class WorkCalendarTest(unittest.TestCase):
+    def test_lookups(self):
+        holiday = datetime.date(2025, 12, 26).toordinal()
+        calendar = WorkCalendar(WEEKDAYS, {holiday: DayCapacity(0, 0)})
+
+        def is_available(ordinal):
+            return ordinal != holiday and (ordinal + 6) % 7 < 5
+
+        rnd = random.Random(0)
+        for _ in range(500):
+            # Outside the first table too, so it has to grow
+            ordinal = holiday + rnd.randint(-2000, 2000)
+            last = ordinal + rnd.randint(0, 40)
+            self.assertEqual(calendar.is_available(ordinal), is_available(ordinal))
+            self.assertEqual(
+                calendar.next_available(ordinal),
+                next(day for day in range(ordinal + 1, ordinal + 8) if is_available(day)),
+            )
+            self.assertEqual(
+                calendar.available_days_between(ordinal, last),
+                sum(is_available(day) for day in range(ordinal + 1, last + 1)),
+            )
+
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "calendar.json")
+            with open(path, "w") as config_file:
+                json.dump(
+                    {
+                        "weekdays": {"friday": {"hours": 6}},
+                        "days": {"01.01.2026": 0, "02.01.2026": {"start": "10:00"}, "03.01.2026": {"start": "9:00"}},
+                    },
+                    config_file,
+                )
+            calendar = WorkCalendar.load(path)
+        capacities = [calendar.capacity(datetime.date(2026, 1, day).toordinal()) for day in range(1, 6)]
+        self.assertEqual(
+            capacities,
+            [
+                DayCapacity(8 * 60, 0),  # holiday
+                DayCapacity(10 * 60, 6 * 60),  # Friday, starting late
+                DayCapacity(9 * 60, 8 * 60),  # Saturday made a working day by its start alone
+                DayCapacity(8 * 60, 0),
+                DayCapacity(8 * 60, 8 * 60),
+            ],
+        )
+
+    def test_relocation_skips_days_off(self):
+        friday = datetime.date(2025, 12, 19)
+        calendar = WorkCalendar(WEEKDAYS, {datetime.date(2025, 12, 22).toordinal(): DayCapacity(10 * 60, 2 * 60)})
+        [first, second] = double_time([LogDay.from_date(friday, [period(friday, 9 * 60, 14 * 60, "1")])], "", calendar)
+        self.assertEqual((first.date, second.date), (friday, datetime.date(2025, 12, 22)))
+        # 5 doubled hours: 3 on the Friday, the next 2 in the short Monday, which starts at 10:00
+        self.assertEqual(clock(second), ["10:00-12:00"])
+
+    def test_pinned_on_day_off(self):
+        saturday, monday = datetime.date(2025, 9, 6), datetime.date(2025, 9, 8)
+        calendar = WorkCalendar(WEEKDAYS)
+        log_days = [
+            LogDay.from_date(
+                saturday, [period(saturday, 9 * 60, 10 * 60, SKIP_TASK), period(saturday, 10 * 60, 11 * 60, "1")]
+            ),
+            LogDay.from_date(monday, [period(monday, 8 * 60 + 30, 9 * 60, SKIP_TASK)]),
+        ]
+        result = {log_day.date: clock(log_day) for log_day in double_time(log_days, SKIP_TASK, calendar)}
+        # The pinned periods keep their time, the doubled one moves to the working day around the pinned one
+        self.assertEqual(result[saturday], ["09:00-10:00"])
+        self.assertEqual(result[monday], ["08:00-08:30", "08:30-09:00", "09:00-10:30"])
+
+    def test_days_off_take_pinned_periods_only(self):
+        calendar = WorkCalendar(WEEKDAYS)
+        scheduled = 0
+        for seed in range(100):
+            with self.subTest(seed=seed):
+                log_days = random_log_days(random.Random(seed))
+                pinned = [
+                    (p.start_minutes, p.end_minutes)
+                    for log_day in log_days
+                    for p in log_day.items
+                    if p.task_id == SKIP_TASK
+                ]
+                result = outcome(lambda: double_time(log_days, SKIP_TASK, calendar))
+                if result is None:
+                    continue
+                scheduled += 1
+                days_off = [item for date, items in result if date.weekday() >= 5 for item in items]
+                for start, end, task_id, _ in days_off:
+                    # Pinned periods overlapping each other are still cut, the rest moves on
+                    self.assertEqual(task_id, SKIP_TASK)
+                    self.assertTrue(any(first <= start and end <= last for first, last in pinned))
+                for start, _ in pinned:
+                    if datetime.date.fromordinal(start // MINUTES_PER_DAY).weekday() >= 5:
+                        self.assertTrue(any(first <= start < last for first, last, _, _ in days_off))
+        # Weekend input used to fail almost always
+        self.assertGreater(scheduled, 70)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import dataclasses
+import logging
+import queue
+import threading
+import typing
+
+from backends import SubmitBackend
+from entities import LogDay, LogPeriod
+
+logger_uploader = logging.getLogger("uploader")
+
+SubmitFunction = typing.Callable[[SubmitBackend, LogPeriod], None]
+CheckFunction = typing.Callable[[LogPeriod], None]
+
+
+@dataclasses.dataclass
+class SubmitResult:
+    index: int
+    log_period: LogPeriod
+    error: typing.Optional[Exception] = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __str__(self):
+        status = "OK" if self.ok else "FAILED %r" % self.error
+        return f"#{self.index} {self.log_period} {status}"
+
+
+def iter_log_periods(data: typing.Iterable[LogDay]) -> typing.Iterator[LogPeriod]:
+    for log_day_item in data:
+        for log_period in log_day_item.items:
+            yield log_period
+
+
+def _submit(backend: SubmitBackend, submit: SubmitFunction, index: int, log_period: LogPeriod) -> SubmitResult:
+    try:
+        submit(backend, log_period)
+    except Exception as e:
+        logger_uploader.exception("Submit failed: %s", log_period)
+        return SubmitResult(index=index, log_period=log_period, error=e)
+    return SubmitResult(index=index, log_period=log_period)
+
+
+def upload(
+    backends: typing.List[SubmitBackend], log_periods: typing.Iterable[LogPeriod], submit: SubmitFunction
+) -> typing.List[SubmitResult]:
+    """Submit every period through a pool of logged in backends, one worker thread per backend.
+
+    Periods are fed through a bounded queue, so the input is consumed lazily.
+    Results are returned in input order, one per period.
+    """
+    if len(backends) == 1:
+        return [_submit(backends[0], submit, index, log_period) for index, log_period in enumerate(log_periods)]
+
+    work = queue.Queue(maxsize=len(backends) * 2)
+    results = {}
+
+    def worker(backend: SubmitBackend):
+        while True:
+            item = work.get()
+            if item is None:
+                return
+            index, log_period = item
+            results[index] = _submit(backend, submit, index, log_period)
+
+    threads = [threading.Thread(target=worker, args=(backend,), daemon=True) for backend in backends]
+    for thread in threads:
+        thread.start()
+
+    try:
+        for index, log_period in enumerate(log_periods):
+            work.put((index, log_period))
+    finally:
+        for _ in threads:
+            work.put(None)
+        for thread in threads:
+            thread.join()
+
+    return [results[index] for index in sorted(results)]
@@ -1,19 +1,43 @@
+import abc
+import array
+import collections
+import concurrent.futures
+import datetime
+import os
 import typing
 
-from entities import LogDay, LogTask, SlotTime, WorkingDaySet
+from entities import MINUTES_PER_DAY, LogDay, LogPeriod, LogTask, SlotTime, WorkingDaySet, from_minutes
+from instrumentation import tracer
+from work_calendar import WorkCalendar
 
 
-def double_time(input_log_days: typing.List[LogDay], skip_task: str) -> typing.Iterable[LogDay]:
-    data = WorkingDaySet()
+def count_scheduling(data: WorkingDaySet):
+    tracer.count("scheduling relocations", data.relocations)
+    tracer.count("scheduling divorces", data.divorces)
+
+
+def double_time(
+    input_log_days: typing.List[LogDay], skip_task: str, calendar: typing.Optional[WorkCalendar] = None
+) -> typing.Iterable[LogDay]:
+    with tracer.span("double_time", category="schedule"):
+        data = _double_time(input_log_days, skip_task, calendar)
+    count_scheduling(data)
+    return data.get_logging()
+
+
+def _double_time(
+    input_log_days: typing.List[LogDay], skip_task: str, calendar: typing.Optional[WorkCalendar] = None
+) -> WorkingDaySet:
+    data = WorkingDaySet(calendar)
 
     for log_day in input_log_days:
         for log_period in log_day.items:
             if log_period.task_id == skip_task:
                 data.add_slot(
-                    slot_for_add=SlotTime(
-                        start=log_period.start,
-                        duration=log_period.end - log_period.start,
-                        task=LogTask(pk=log_period.task_id, description=log_period.description),
+                    slot_for_add=SlotTime.from_minutes(
+                        log_period.start_minutes,
+                        log_period.duration_minutes,
+                        LogTask(pk=log_period.task_id, description=log_period.description),
                     ),
                     can_divorce=False,
                 )
@@ -24,13 +48,374 @@ def double_time(input_log_days: typing.List[LogDay], skip_task: str) -> typing.I
                 continue
 
             data.add_slot(
-                slot_for_add=SlotTime(
-                    start=log_period.start,
-                    duration=(log_period.end - log_period.start) * 2,
-                    task=LogTask(pk=log_period.task_id, description=log_period.description),
+                slot_for_add=SlotTime.from_minutes(
+                    log_period.start_minutes,
+                    log_period.duration_minutes * 2,
+                    LogTask(pk=log_period.task_id, description=log_period.description),
                 ),
                 can_divorce=True,
                 any_after=True,
             )
 
-    return data.get_logging()
+    return data
+
+
+# LogDays as plain tuples, several times cheaper to pickle: for the data cache and the process pool
+PackedLogDay = typing.Tuple[int, typing.List[typing.Tuple[int, int, str, typing.Optional[str]]]]
+ShardResult = typing.Tuple[typing.Optional[typing.List[PackedLogDay]], typing.Optional[Exception], int, int]
+
+
+def pack_log_days(log_days: typing.Iterable[LogDay]) -> typing.List[PackedLogDay]:
+    return [
+        (
+            log_day.date.toordinal(),
+            [(item.start_minutes, item.end_minutes, item.description, item.task_id) for item in log_day.items],
+        )
+        for log_day in log_days
+    ]
+
+
+def unpack_log_days(packed_log_days: typing.List[PackedLogDay]) -> typing.List[LogDay]:
+    return [
+        LogDay.from_date(
+            datetime.date.fromordinal(date_ordinal),
+            [
+                LogPeriod.from_minutes(start, end, description, task_id=task_id)
+                for start, end, description, task_id in items
+            ],
+        )
+        for date_ordinal, items in packed_log_days
+    ]
+
+
+def _double_time_shard(
+    packed_log_days: typing.List[PackedLogDay], skip_task: str, calendar: typing.Optional[WorkCalendar]
+) -> ShardResult:
+    try:
+        data = _double_time(unpack_log_days(packed_log_days), skip_task, calendar)
+    except Exception as e:
+        return None, e, 0, 0
+    return pack_log_days(data.get_logging()), None, data.relocations, data.divorces
+
+
+def _split_shards(input_log_days: typing.List[LogDay], shards: int) -> typing.List[typing.List[LogDay]]:
+    """Cut date sorted input into runs of about equal period counts, only between different dates."""
+    total = sum(len(log_day.items) for log_day in input_log_days)
+    target = max(1, total // shards)
+    result = [[]]
+    periods = 0
+    for log_day in input_log_days:
+        if periods >= target and result[-1][-1].date != log_day.date:
+            result.append([])
+            periods = 0
+        result[-1].append(log_day)
+        periods += len(log_day.items)
+    return result
+
+
+def double_time_parallel(
+    input_log_days: typing.Iterable[LogDay],
+    skip_task: str,
+    workers: typing.Optional[int] = None,
+    calendar: typing.Optional[WorkCalendar] = None,
+) -> typing.List[LogDay]:
+    """Same output as double_time for input sorted by date, scheduled as date range shards in a process pool.
+
+    Slots only relocate forward and a few days at most, so a shard usually touches no day of the next one.
+    That is checked after the fact: a shard whose output (or failure) reaches the next shard's first date
+    is merged with it and the pair is scheduled again, until every boundary holds.
+    """
+    input_log_days = list(input_log_days)
+    workers = workers or os.cpu_count() or 1
+    dates = [log_day.date for log_day in input_log_days]
+    if workers == 1 or dates != sorted(dates):
+        return list(double_time(input_log_days, skip_task, calendar))
+
+    with tracer.span("double_time_parallel", category="schedule"):
+        shards = [pack_log_days(shard) for shard in _split_shards(input_log_days, workers * 2)]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(
+                executor.map(_double_time_shard, shards, [skip_task] * len(shards), [calendar] * len(shards))
+            )
+
+        index = 0
+        while index < len(shards) - 1:
+            output, error, _, _ = results[index]
+            if error is None and (not output or output[-1][0] < shards[index + 1][0][0]):
+                index += 1
+                continue
+            shards[index : index + 2] = [shards[index] + shards[index + 1]]
+            results[index : index + 2] = [_double_time_shard(shards[index], skip_task, calendar)]
+
+    output_log_days = []
+    for output, error, relocations, divorces in results:
+        if error is not None:
+            raise error
+        tracer.count("scheduling relocations", relocations)
+        tracer.count("scheduling divorces", divorces)
+        output_log_days.extend(unpack_log_days(output))
+    return output_log_days
+
+
+def double_time_stream(
+    input_log_days: typing.Iterable[LogDay], skip_task: str, calendar: typing.Optional[WorkCalendar] = None
+) -> typing.Iterator[LogDay]:
+    """Same output as double_time, for input LogDays sorted by date, consumed and yielded day by day.
+
+    skip_task periods of a day are pinned right before the first slot lands on that day, so every day still
+    sees its pinned periods before any doubled one. A day is yielded once the next doubled period starts
+    after it: slots only ever relocate forward, so nothing can land on it any more.
+    """
+    data = WorkingDaySet(calendar)
+    input_iter = iter(input_log_days)
+    pending = collections.deque()
+    last_date: typing.Optional[datetime.date] = None
+
+    def read_day() -> bool:
+        nonlocal last_date
+        log_day = next(input_iter, None)
+        if log_day is None:
+            return False
+        if last_date and log_day.date < last_date:
+            raise Exception("Log days must be sorted by date")
+        last_date = log_day.date
+
+        # Pinned periods follow input order only, as in double_time
+        before_day, data.before_day = data.before_day, None
+        for log_period in log_day.items:
+            if log_period.task_id == skip_task:
+                data.add_slot(
+                    slot_for_add=SlotTime.from_minutes(
+                        log_period.start_minutes,
+                        log_period.duration_minutes,
+                        LogTask(pk=log_period.task_id, description=log_period.description),
+                    ),
+                    can_divorce=False,
+                )
+        data.before_day = before_day
+
+        pending.append(log_day)
+        return True
+
+    def pin_until(date: datetime.date):
+        while (last_date is None or last_date <= date) and read_day():
+            pass
+
+    data.before_day = pin_until
+
+    while pending or read_day():
+        log_day = pending.popleft()
+        for log_period in log_day.items:
+            if log_period.task_id == skip_task:
+                continue
+
+            data.add_slot(
+                slot_for_add=SlotTime.from_minutes(
+                    log_period.start_minutes,
+                    log_period.duration_minutes * 2,
+                    LogTask(pk=log_period.task_id, description=log_period.description),
+                ),
+                can_divorce=True,
+                any_after=True,
+            )
+
+        if not pending:
+            read_day()
+        yield from data.pop_logging(before=pending[0].date if pending else None)
+
+    count_scheduling(data)
+
+
+class PeriodColumns:
+    """Periods as parallel columns, with start and end as integer minutes (see to_minutes)."""
+
+    starts: array.array
+    ends: array.array
+    task_ids: typing.List[typing.Optional[str]]
+    descriptions: typing.List[str]
+
+    def __init__(self):
+        self.starts = array.array("q")
+        self.ends = array.array("q")
+        self.task_ids = []
+        self.descriptions = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self) -> typing.Iterator[typing.Tuple[int, int, typing.Optional[str], str]]:
+        return zip(self.starts, self.ends, self.task_ids, self.descriptions)
+
+    def append(self, start: int, end: int, task_id: typing.Optional[str], description: str):
+        self.starts.append(start)
+        self.ends.append(end)
+        self.task_ids.append(task_id)
+        self.descriptions.append(description)
+
+    @classmethod
+    def from_log_days(cls, log_days: typing.Iterable[LogDay]) -> "PeriodColumns":
+        columns = cls()
+        for log_day in log_days:
+            for log_period in log_day.items:
+                columns.append(
+                    log_period.start_minutes, log_period.end_minutes, log_period.task_id, log_period.description
+                )
+        return columns
+
+    def to_log_days(self) -> typing.List[LogDay]:
+        """Group by date, keeping column order within a day."""
+        days = collections.defaultdict(list)
+        for start, end, task_id, description in self:
+            days[start // MINUTES_PER_DAY].append(LogPeriod.from_minutes(start, end, description, task_id=task_id))
+        return [LogDay.from_date(datetime.date.fromordinal(day), items) for day, items in sorted(days.items())]
+
+
+class TransformStage(abc.ABC):
+    """One step of transform(): takes the period columns and returns new ones, row by row."""
+
+    @abc.abstractmethod
+    def __call__(self, columns: PeriodColumns) -> PeriodColumns:
+        pass
+
+
+class Scale(TransformStage):
+    """Multiply durations per task, keeping the start."""
+
+    def __init__(self, multipliers: typing.Dict[str, float], default: float = 1.0):
+        self.multipliers = multipliers
+        self.default = default
+
+    def __call__(self, columns: PeriodColumns) -> PeriodColumns:
+        result = PeriodColumns()
+        for start, end, task_id, description in columns:
+            factor = self.multipliers.get(task_id, self.default)
+            result.append(start, start + round((end - start) * factor), task_id, description)
+        return result
+
+
+class RoundToGrid(TransformStage):
+    """Round start and end to the nearest grid step, dropping periods that collapse to nothing."""
+
+    def __init__(self, minutes: int = 15):
+        self.minutes = minutes
+
+    def _round(self, value: int) -> int:
+        return (value + self.minutes // 2) // self.minutes * self.minutes
+
+    def __call__(self, columns: PeriodColumns) -> PeriodColumns:
+        result = PeriodColumns()
+        for start, end, task_id, description in columns:
+            start, end = self._round(start), self._round(end)
+            if end > start:
+                result.append(start, end, task_id, description)
+        return result
+
+
+class CapPerDay(TransformStage):
+    """Cut periods once a day holds `minutes` in total, in column order."""
+
+    def __init__(self, minutes: int):
+        self.minutes = minutes
+
+    def _key(self, start: int, task_id: typing.Optional[str]):
+        return start // MINUTES_PER_DAY
+
+    def __call__(self, columns: PeriodColumns) -> PeriodColumns:
+        result = PeriodColumns()
+        used = collections.Counter()
+        for start, end, task_id, description in columns:
+            key = self._key(start, task_id)
+            end = min(end, start + self.minutes - used[key])
+            if end > start:
+                used[key] += end - start
+                result.append(start, end, task_id, description)
+        return result
+
+
+class CapPerTask(CapPerDay):
+    """Cut periods once a task holds `minutes` on a day."""
+
+    def _key(self, start: int, task_id: typing.Optional[str]):
+        return start // MINUTES_PER_DAY, task_id
+
+
+class MergeAdjacent(TransformStage):
+    """Join back-to-back periods of the same task and description."""
+
+    def __call__(self, columns: PeriodColumns) -> PeriodColumns:
+        result = PeriodColumns()
+        for start, end, task_id, description in columns:
+            if (
+                result
+                and result.ends[-1] == start
+                and result.task_ids[-1] == task_id
+                and result.descriptions[-1] == description
+                and (end - 1) // MINUTES_PER_DAY == start // MINUTES_PER_DAY
+            ):
+                result.ends[-1] = end
+                continue
+            result.append(start, end, task_id, description)
+        return result
+
+
+class Validate(TransformStage):
+    """Check every period is non-empty, within its day and not overlapping another one."""
+
+    class Invalid(Exception):
+        pass
+
+    def __call__(self, columns: PeriodColumns) -> PeriodColumns:
+        previous_end = None
+        for index in sorted(range(len(columns)), key=columns.starts.__getitem__):
+            start, end = columns.starts[index], columns.ends[index]
+            if end <= start:
+                raise self.Invalid("Empty period: %s" % from_minutes(start))
+            if (end - 1) // MINUTES_PER_DAY != start // MINUTES_PER_DAY:
+                raise self.Invalid("Period ends on another day: %s" % from_minutes(start))
+            if previous_end is not None and start < previous_end:
+                raise self.Invalid("Overlapping period: %s" % from_minutes(start))
+            previous_end = end
+        return columns
+
+
+class Schedule(TransformStage):
+    """Place periods into working days like double_time: pinned tasks at their time, the rest relocated forward."""
+
+    def __init__(self, pinned_task_ids: typing.Collection[str] = (), calendar: typing.Optional[WorkCalendar] = None):
+        self.pinned_task_ids = set(pinned_task_ids)
+        self.calendar = calendar
+
+    def _add(self, data: WorkingDaySet, start: int, end: int, task_id: str, description: str, pinned: bool):
+        data.add_slot(
+            slot_for_add=SlotTime.from_minutes(start, end - start, LogTask(pk=task_id, description=description)),
+            can_divorce=not pinned,
+            any_after=not pinned,
+        )
+
+    def __call__(self, columns: PeriodColumns) -> PeriodColumns:
+        data = WorkingDaySet(self.calendar)
+        with tracer.span("Schedule", category="schedule"):
+            for start, end, task_id, description in columns:
+                if task_id in self.pinned_task_ids:
+                    self._add(data, start, end, task_id, description, pinned=True)
+            for start, end, task_id, description in columns:
+                if task_id not in self.pinned_task_ids:
+                    self._add(data, start, end, task_id, description, pinned=False)
+        count_scheduling(data)
+
+        result = PeriodColumns()
+        for working_day in data:
+            for slot in working_day.slots:
+                if slot.task:
+                    result.append(slot.start_minute, slot.end_minute, slot.task.pk, slot.task.description)
+        return result
+
+
+def transform(input_log_days: typing.Iterable[LogDay], stages: typing.Sequence[TransformStage]) -> typing.List[LogDay]:
+    """Run LogDays through the stages, e.g. double_time is
+    `transform(log_days, [Scale({skip_task: 1}, default=2), Schedule(pinned_task_ids=[skip_task])])`.
+    """
+    columns = PeriodColumns.from_log_days(input_log_days)
+    for stage in stages:
+        columns = stage(columns)
+    return columns.to_log_days()
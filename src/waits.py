@@ -0,0 +1,108 @@
+import contextlib
+import dataclasses
+import logging
+import time
+import typing
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.wait import WebDriverWait
+
+logger_waits = logging.getLogger("waits")
+
+
+@dataclasses.dataclass
+class WaitRecord:
+    name: str
+    duration: float
+
+
+class PageWaiter:
+    """Explicit WebDriver waits with per-wait timing and an optional per-entry latency budget."""
+
+    class EntryBudgetExceeded(TimeoutException):
+        pass
+
+    DEFAULT_TIMEOUT = 10.0
+    DEFAULT_POLL_FREQUENCY = 0.1
+
+    driver: WebDriver
+    timeout: float
+    entry_budget: typing.Optional[float]
+    records: typing.List[WaitRecord]
+
+    def __init__(
+        self,
+        driver: WebDriver,
+        timeout: float = DEFAULT_TIMEOUT,
+        poll_frequency: float = DEFAULT_POLL_FREQUENCY,
+        entry_budget: typing.Optional[float] = None,
+    ):
+        self.driver = driver
+        self.timeout = timeout
+        self.poll_frequency = poll_frequency
+        self.entry_budget = entry_budget
+        self.records = []
+        self._entry_started = None
+
+    @contextlib.contextmanager
+    def entry(self):
+        self._entry_started = time.monotonic()
+        try:
+            yield
+        finally:
+            logger_waits.debug("Entry took %.3fs", time.monotonic() - self._entry_started)
+            self._entry_started = None
+
+    def _get_timeout(self, timeout: typing.Optional[float]) -> float:
+        timeout = self.timeout if timeout is None else timeout
+        if self.entry_budget is None or self._entry_started is None:
+            return timeout
+
+        budget_left = self.entry_budget - (time.monotonic() - self._entry_started)
+        if budget_left <= 0:
+            raise self.EntryBudgetExceeded("Entry latency budget of %ss exceeded" % self.entry_budget)
+        return min(timeout, budget_left)
+
+    def until(self, name: str, condition: typing.Callable, timeout: typing.Optional[float] = None):
+        wait = WebDriverWait(self.driver, self._get_timeout(timeout), poll_frequency=self.poll_frequency)
+        started = time.monotonic()
+        try:
+            return wait.until(condition, message="Waiting for %s" % name)
+        finally:
+            duration = time.monotonic() - started
+            self.records.append(WaitRecord(name=name, duration=duration))
+            logger_waits.debug("Waited %.3fs for %s", duration, name)
+
+    def present(self, by: str, value: str, timeout: typing.Optional[float] = None) -> WebElement:
+        return self.until("present %s" % value, expected_conditions.presence_of_element_located((by, value)), timeout)
+
+    def visible(self, by: str, value: str, timeout: typing.Optional[float] = None) -> WebElement:
+        return self.until("visible %s" % value, expected_conditions.visibility_of_element_located((by, value)), timeout)
+
+    def clickable(self, by: str, value: str, timeout: typing.Optional[float] = None) -> WebElement:
+        return self.until("clickable %s" % value, expected_conditions.element_to_be_clickable((by, value)), timeout)
+
+    def option(self, text: str, timeout: typing.Optional[float] = None) -> WebElement:
+        locator = (By.XPATH, '//div[text()="%s"]' % text)
+        return self.until("option %s" % text, expected_conditions.element_to_be_clickable(locator), timeout)
+
+    def gone(self, name: str, element: WebElement, timeout: typing.Optional[float] = None) -> bool:
+        return self.until("gone %s" % name, expected_conditions.invisibility_of_element(element), timeout)
+
+    def stale(self, name: str, element: WebElement, timeout: typing.Optional[float] = None) -> bool:
+        return self.until("stale %s" % name, expected_conditions.staleness_of(element), timeout)
+
+    def summary(self) -> str:
+        totals = {}
+        for record in self.records:
+            count, duration = totals.get(record.name, (0, 0.0))
+            totals[record.name] = (count + 1, duration + record.duration)
+
+        lines = ["Waits: %s, %.1fs" % (len(self.records), sum(record.duration for record in self.records))]
+        for name, (count, duration) in sorted(totals.items(), key=lambda item: -item[1][1]):
+            lines.append("\t%.2fs x%s %s" % (duration, count, name))
+        return "\n".join(lines)
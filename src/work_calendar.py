@@ -0,0 +1,155 @@
+import array
+import datetime
+import json
+import typing
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+class DayCapacity(typing.NamedTuple):
+    start_minute: int  # of the day
+    minutes: int
+
+
+class WorkCalendar:
+    """Working time per date: weekday defaults with dated exceptions (holidays, part-time days, late starts).
+
+    The dates are kept in a table indexed by ordinal, together with the next date that takes work and a running
+    count of such dates, so every lookup is an array access. The table grows when a date outside it is asked for.
+
+    A JSON config looks like:
+
+        {
+            "start": "8:00",
+            "hours": 8,
+            "weekdays": {"friday": {"hours": 6}, "saturday": 0, "sunday": 0},
+            "days": {"01.01.2025": 0, "24.12.2025": {"hours": 4}, "02.05.2025": {"start": "10:00"}}
+        }
+
+    A number is the hours of the day, 0 for a day off; Saturday and Sunday are days off unless configured.
+    A date with only a start on a day-off weekday works the default hours.
+    """
+
+    # Dates added around a missing one when the table grows, so growing is rare
+    MARGIN_DAYS = 366
+
+    weekdays: typing.List[DayCapacity]
+    days: typing.Dict[int, DayCapacity]
+
+    def __init__(
+        self, weekdays: typing.Sequence[DayCapacity], days: typing.Optional[typing.Dict[int, DayCapacity]] = None
+    ):
+        if len(weekdays) != 7:
+            raise Exception("WorkCalendar needs the capacity of all 7 weekdays")
+        if not any(capacity.minutes for capacity in weekdays):
+            raise Exception("WorkCalendar has no working weekday")
+        self.weekdays = list(weekdays)
+        self.days = days or {}
+        self._first = 0
+        self._starts = array.array("i")
+        self._minutes = array.array("i")
+        self._next = array.array("i")
+        # _available_before[i]: working dates in the table before index i
+        self._available_before = array.array("i", [0])
+
+    @classmethod
+    def load(cls, path: str) -> "WorkCalendar":
+        with open(path, encoding="utf-8") as config_file:
+            config = json.load(config_file)
+
+        default = cls._capacity(
+            {"start": config.get("start", "8:00"), "hours": config.get("hours", 8)}, DayCapacity(0, 0)
+        )
+        weekday_config = {"saturday": 0, "sunday": 0, **config.get("weekdays", {})}
+        for name in weekday_config:
+            if name not in WEEKDAYS:
+                raise Exception("Unknown weekday: %s" % name)
+        weekdays = [cls._capacity(weekday_config.get(name), default) for name in WEEKDAYS]
+
+        days = {}
+        for value, day_config in config.get("days", {}).items():
+            day, month, year = value.split(".")
+            date = datetime.date(int(year), int(month), int(day))
+            # A working date on a day-off weekday takes the default hours unless it sets its own
+            base = weekdays[date.weekday()]
+            if not base.minutes:
+                base = default
+            days[date.toordinal()] = cls._capacity(day_config, base)
+        return cls(weekdays, days)
+
+    @staticmethod
+    def _capacity(config: typing.Union[None, int, float, dict], base: DayCapacity) -> DayCapacity:
+        if config is None:
+            return base
+        if not isinstance(config, dict):
+            config = {"hours": config}
+        start = base.start_minute
+        if "start" in config:
+            start_time = datetime.datetime.strptime(config["start"], "%H:%M")
+            start = start_time.hour * 60 + start_time.minute
+        minutes = round(config["hours"] * 60) if "hours" in config else base.minutes
+        if start + minutes > 24 * 60:
+            raise Exception("Working time past midnight: %s" % config)
+        return DayCapacity(start_minute=start, minutes=minutes)
+
+    def _day(self, ordinal: int) -> DayCapacity:
+        capacity = self.days.get(ordinal)
+        if capacity is None:
+            capacity = self.weekdays[(ordinal + 6) % 7]
+        return capacity
+
+    def _build(self, first: int, last: int):
+        self._first = first
+        self._starts = array.array("i")
+        self._minutes = array.array("i")
+        self._available_before = array.array("i", [0])
+        for ordinal in range(first, last + 1):
+            capacity = self._day(ordinal)
+            self._starts.append(capacity.start_minute)
+            self._minutes.append(capacity.minutes)
+            self._available_before.append(self._available_before[-1] + (capacity.minutes > 0))
+
+        # -1 past the last working date of the table, found by growing it
+        self._next = array.array("i", [-1]) * len(self._minutes)
+        next_ordinal = -1
+        for index in range(len(self._minutes) - 1, -1, -1):
+            self._next[index] = next_ordinal
+            if self._minutes[index]:
+                next_ordinal = first + index
+
+    def _index(self, ordinal: int) -> int:
+        """Table index of the date, growing the table when needed: take it before reading the arrays."""
+        index = ordinal - self._first
+        if 0 <= index < len(self._minutes):
+            return index
+        if not self._minutes:
+            self._build(ordinal - self.MARGIN_DAYS, ordinal + self.MARGIN_DAYS)
+        else:
+            last = self._first + len(self._minutes) - 1
+            self._build(min(self._first, ordinal - self.MARGIN_DAYS), max(last, ordinal + self.MARGIN_DAYS))
+        return ordinal - self._first
+
+    def capacity(self, ordinal: int) -> DayCapacity:
+        index = self._index(ordinal)
+        return DayCapacity(self._starts[index], self._minutes[index])
+
+    def is_available(self, ordinal: int) -> bool:
+        index = self._index(ordinal)
+        return self._minutes[index] > 0
+
+    def next_available(self, ordinal: int) -> int:
+        """The first date after `ordinal` that takes work."""
+        index = self._index(ordinal)
+        next_ordinal = self._next[index]
+        if next_ordinal == -1:
+            # A working weekday is at most 6 days on, past the dated exceptions at the end of the table
+            self._index(ordinal + self.MARGIN_DAYS + len(self.days) + 7)
+            index = self._index(ordinal)
+            next_ordinal = self._next[index]
+        return next_ordinal
+
+    def available_days_between(self, first: int, last: int) -> int:
+        """Working dates after `first` up to and including `last`."""
+        self._index(first)
+        self._index(last)
+        return self._available_before[last - self._first + 1] - self._available_before[first - self._first + 1]